@@ -0,0 +1,95 @@
+"""
+Benchmark do cache de aptidão do algoritmo genético.
+
+Para as quantidades de iterações que os usuários costumam informar, mostra
+quantas avaliações a execução pediu, quantas foram realmente calculadas e o
+tempo total com e sem o cache.
+
+Uso:
+    python benchmark_cache.py --file Itens.csv --iterations 10 100 1000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from fitness import ItemArrays
+from fitness_cache import FitnessCache
+from ga_engine import GAParameters, run_ga
+
+
+def run_benchmark(data, max_weight, max_volume, iterations, repeats, seed=0):
+    items = ItemArrays.from_frame(data)
+    params = GAParameters(population_size=10)
+    results = []
+    for max_num_iteration in iterations:
+        requested = real = 0
+        cached_seconds = plain_seconds = 0.0
+        for repeat in range(repeats):
+            cache = FitnessCache(items, max_weight, max_volume)
+            start = time.perf_counter()
+            run_ga(
+                items,
+                max_weight,
+                max_volume,
+                params,
+                max_num_iteration,
+                seed=seed + repeat,
+                cache=cache,
+            )
+            cached_seconds += time.perf_counter() - start
+            requested += cache.hits + cache.misses
+            real += cache.misses
+
+            start = time.perf_counter()
+            run_ga(
+                items,
+                max_weight,
+                max_volume,
+                params,
+                max_num_iteration,
+                seed=seed + repeat,
+            )
+            plain_seconds += time.perf_counter() - start
+        row = {
+            "iteracoes": max_num_iteration,
+            "avaliacoes": requested / repeats,
+            "avaliacoes_reais": real / repeats,
+            "economia": 1 - real / requested,
+            "segundos_com_cache": cached_seconds / repeats,
+            "segundos_sem_cache": plain_seconds / repeats,
+        }
+        results.append(row)
+        print(
+            f"{max_num_iteration:>6} iterações: "
+            f"{row['avaliacoes']:>9,.0f} avaliações, "
+            f"{row['avaliacoes_reais']:>9,.0f} reais "
+            f"({row['economia']:.0%} evitadas) | "
+            f"{row['segundos_com_cache']:.3f} s com cache, "
+            f"{row['segundos_sem_cache']:.3f} s sem",
+            flush=True,
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark do cache de aptidão do algoritmo genético"
+    )
+    parser.add_argument("--file", default="Itens.csv")
+    parser.add_argument("--max-weight", type=float, default=6000)
+    parser.add_argument("--max-volume", type=float, default=350)
+    parser.add_argument(
+        "--iterations", nargs="+", type=int, default=[10, 50, 100, 500, 1000]
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    data = pd.read_csv(args.file, sep=";")
+    run_benchmark(
+        data, args.max_weight, args.max_volume, args.iterations, args.repeats
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark das avaliações de aptidão por segundo.
+
+Compara a função original (indexação do pandas a cada avaliação) com a versão
+vetorizada por cromossomo e por população, para 20, 1 mil e 100 mil itens.
+
+Uso:
+    python benchmark_fitness.py --sizes 20 1000 100000 --population 100
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fitness import ItemArrays, fitness_function, population_fitness
+
+
+def pandas_fitness_function(X, data, max_volume, max_weight):
+    """Implementação original, mantida como referência."""
+    selected_items = data.iloc[X.astype(bool), :]
+    total_weight = selected_items["PESO"].sum()
+    total_volume = selected_items["VOLUME"].sum()
+    if total_weight > max_weight or total_volume > max_volume:
+        return -1
+    else:
+        return -selected_items["VALOR"].sum()
+
+
+def synthetic_items(n_items, rng):
+    """Tabela de itens com as mesmas faixas do Itens.csv."""
+    return pd.DataFrame(
+        {
+            "ID": np.arange(1, n_items + 1),
+            "PESO": rng.integers(100, 1000, n_items),
+            "VALOR": rng.integers(1000, 10000, n_items),
+            "VOLUME": rng.integers(10, 50, n_items),
+        }
+    )
+
+
+def evaluations_per_second(evaluate, population, min_seconds):
+    """Repete evaluate(population) até min_seconds e mede a vazão."""
+    evaluations = 0
+    start = time.perf_counter()
+    while True:
+        evaluations += evaluate(population)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return evaluations / elapsed
+
+
+def run_benchmark(sizes, population_size, min_seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for n_items in sizes:
+        data = synthetic_items(n_items, rng)
+        items = ItemArrays.from_frame(data)
+        # Capacidades de cerca de metade do total, como na sobra do app
+        max_weight = data["PESO"].sum() / 2
+        max_volume = data["VOLUME"].sum() / 2
+        population = rng.integers(0, 2, (population_size, n_items)).astype(
+            np.float64
+        )
+
+        def run_pandas(P):
+            for X in P:
+                pandas_fitness_function(X, data, max_volume, max_weight)
+            return len(P)
+
+        def run_numpy(P):
+            for X in P:
+                fitness_function(X, items, max_volume, max_weight)
+            return len(P)
+
+        def run_population(P):
+            population_fitness(P, items, max_volume, max_weight)
+            return len(P)
+
+        row = {"itens": n_items}
+        for name, evaluate in [
+            ("pandas", run_pandas),
+            ("numpy", run_numpy),
+            ("populacao", run_population),
+        ]:
+            row[name] = evaluations_per_second(
+                evaluate, population, min_seconds
+            )
+        results.append(row)
+        print(
+            f"{n_items:>7} itens: "
+            f"pandas {row['pandas']:>12,.0f} aval/s | "
+            f"numpy {row['numpy']:>12,.0f} aval/s | "
+            f"população {row['populacao']:>12,.0f} aval/s "
+            f"({row['populacao'] / row['pandas']:,.0f}x)",
+            flush=True,
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark da função de aptidão da otimização de carga"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[20, 1000, 100000]
+    )
+    parser.add_argument("--population", type=int, default=100)
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.population, args.min_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
+import os
+import time
+
 import pandas as pd
 import streamlit as st
-from geneticalgorithm import geneticalgorithm as ga
 from st_aggrid import AgGrid
 
+from exact_solver import SolverResult, lp_upper_bound, solve_exact
+from fitness import ItemArrays
+from fitness_cache import FitnessCache
+from ga_engine import GAParameters, run_ga
+from islands import run_islands
+from multi_vehicle import fleet_summary, plan_fleet
+
 # Configuração da página do Streamlit
 st.set_page_config(
     page_title="Otimização de Transporte de Carga", layout="wide"
@@ -15,15 +24,29 @@ def load_data(file):
     return pd.read_csv(file, sep=";")
 
 
-# Função de avaliação do algoritmo genético
-def fitness_function(X, data, max_volume, max_weight):
-    selected_items = data.iloc[X.astype(bool), :]
-    total_weight = selected_items["PESO"].sum()
-    total_volume = selected_items["VOLUME"].sum()
-    if total_weight > max_weight or total_volume > max_volume:
-        return -1
-    else:
-        return -selected_items["VALOR"].sum()
+# Gráfico de convergência atualizado durante a execução do algoritmo
+# genético, com no máximo uma atualização a cada interval segundos
+def live_convergence_chart(interval=0.25):
+    chart = st.line_chart(pd.DataFrame({"Melhor": [], "Média": []}))
+    pending = []
+    last_update = [time.perf_counter()]
+
+    def flush():
+        if pending:
+            chart.add_rows(
+                pd.DataFrame(
+                    pending, columns=["Geração", "Melhor", "Média"]
+                ).set_index("Geração")
+            )
+            pending.clear()
+        last_update[0] = time.perf_counter()
+
+    def on_generation(generation, best, mean):
+        pending.append((generation + 1, -best, -mean))
+        if time.perf_counter() - last_update[0] >= interval:
+            flush()
+
+    return on_generation, flush
 
 
 data = None
@@ -49,35 +72,194 @@ with col2.expander("Processamento"):
     if data is not None:
         sobra_peso = st.number_input("Informe a sobra de Peso", value=6000)
         sobra_volume = st.number_input("Informe a sobra de Volume", value=350)
-        iteracao = st.number_input(
-            "Informe a quantidade de Iterações", value=10
+        metodo = st.selectbox(
+            "Método de Otimização",
+            ["Algoritmo Genético", "Algoritmo Genético (Ilhas)", "Exato"],
         )
+        if metodo != "Exato":
+            iteracao = st.number_input(
+                "Informe a quantidade de Iterações", min_value=1, value=10
+            )
+        if metodo == "Algoritmo Genético":
+            sem_melhoria = st.number_input(
+                "Parar após Gerações sem Melhoria (0 = nunca)",
+                min_value=0,
+                value=0,
+            )
+            continuar = st.checkbox(
+                "Partir da população da execução anterior", value=True
+            )
+            memorizar = st.checkbox(
+                "Memorizar a Aptidão (cache)",
+                value=False,
+                help="Evita reavaliar cromossomos repetidos, mas com a "
+                "aptidão vetorizada costuma deixar a execução mais lenta",
+            )
+        if metodo == "Algoritmo Genético (Ilhas)":
+            ilhas = st.number_input(
+                "Quantidade de Ilhas", min_value=1, value=os.cpu_count() or 1
+            )
+            intervalo_migracao = st.number_input(
+                "Gerações entre Migrações", min_value=1, value=10
+            )
+        elif metodo == "Exato":
+            limite_tempo = st.number_input(
+                "Limite de Tempo (segundos)", min_value=1, value=30
+            )
         process_button = st.button("Processar")
         if process_button:
-            algorithm_param = {
-                "max_num_iteration": iteracao,
-                "population_size": 10,
-                "mutation_probability": 0.1,
-                "elit_ratio": 0.01,
-                "crossover_probability": 0.5,
-                "parents_portion": 0.3,
-                "crossover_type": "uniform",
-                "max_iteration_without_improv": None,
-            }
-            varbound = [[0, 1]] * len(data)
-            model = ga(
-                function=lambda X: fitness_function(
-                    X, data, sobra_volume, sobra_peso
-                ),
-                dimension=len(data),
-                variable_type="bool",
-                variable_boundaries=varbound,
-                algorithm_parameters=algorithm_param,
-            )
-            model.run()
-            solution = data.iloc[model.output_dict["variable"].astype(bool), :]
+            # Arrays calculados uma vez, fora do laço de otimização
+            items = ItemArrays.from_frame(data)
+            curves = None
+            cache = None
+            if metodo == "Exato":
+                result = solve_exact(
+                    items, sobra_peso, sobra_volume, limite_tempo
+                )
+            elif metodo == "Algoritmo Genético (Ilhas)":
+                island_result = run_islands(
+                    items,
+                    sobra_peso,
+                    sobra_volume,
+                    GAParameters(population_size=10),
+                    iteracao,
+                    n_islands=ilhas,
+                    migration_interval=intervalo_migracao,
+                )
+                result = SolverResult(
+                    selected=island_result.selected,
+                    value=-island_result.fitness,
+                    upper_bound=lp_upper_bound(
+                        items, sobra_peso, sobra_volume
+                    )[0],
+                    seconds=island_result.seconds,
+                    method=metodo,
+                )
+                curves = pd.DataFrame(
+                    -island_result.curves.T,
+                    columns=[
+                        f"Ilha {idx + 1}"
+                        for idx in range(len(island_result.curves))
+                    ],
+                )
+            else:
+                algorithm_param = {
+                    "max_num_iteration": iteracao,
+                    "population_size": 10,
+                    "mutation_probability": 0.1,
+                    "elit_ratio": 0.01,
+                    "crossover_probability": 0.5,
+                    "parents_portion": 0.3,
+                    "crossover_type": "uniform",
+                    "max_iteration_without_improv": sem_melhoria or None,
+                }
+                # Ao mudar só as sobras, a busca recomeça da população
+                # anterior (reparada para as novas capacidades)
+                previous = st.session_state.get("populacao")
+                if not continuar or previous is None or (
+                    previous.shape[1] != len(data)
+                ):
+                    previous = None
+                on_generation, flush = live_convergence_chart()
+                if memorizar:
+                    cache = FitnessCache(items, sobra_peso, sobra_volume)
+                ga_result = run_ga(
+                    items,
+                    sobra_peso,
+                    sobra_volume,
+                    GAParameters.from_dict(algorithm_param),
+                    algorithm_param["max_num_iteration"],
+                    algorithm_param["max_iteration_without_improv"],
+                    previous_population=previous,
+                    on_generation=on_generation,
+                    cache=cache,
+                )
+                flush()
+                st.session_state["populacao"] = ga_result.population
+                result = SolverResult(
+                    selected=ga_result.selected,
+                    value=float(items.value[ga_result.selected].sum()),
+                    upper_bound=lp_upper_bound(
+                        items, sobra_peso, sobra_volume
+                    )[0],
+                    seconds=ga_result.seconds,
+                    method=metodo,
+                )
+                if ga_result.stopped_early:
+                    st.write(
+                        "Parada antecipada na geração "
+                        f"{len(ga_result.history)}: {sem_melhoria} "
+                        "gerações sem melhoria"
+                    )
+            solution = data.iloc[result.selected, :]
             AgGrid(solution)
             st.write(f"Quantidade Final: {len(solution)}")
             st.write(f"Peso Final: {solution['PESO'].sum()}")
             st.write(f"Volume Final: {solution['VOLUME'].sum()}")
             st.write(f"Valor Total: {solution['VALOR'].sum()}")
+            st.write(f"Método: {result.method} ({result.seconds:.2f} s)")
+            if cache is not None:
+                st.write(
+                    f"Cache de Aptidão: {cache.hit_rate:.0%} de acertos, "
+                    f"{cache.hits} de {cache.hits + cache.misses} "
+                    "avaliações evitadas"
+                )
+            if result.optimal:
+                st.success("Solução ótima comprovada")
+            else:
+                st.write(
+                    f"Gap de Otimalidade: {result.gap:.2%} "
+                    f"(limite superior: {result.upper_bound:,.0f})"
+                )
+            if curves is not None:
+                st.write("Convergência por Ilha (melhor valor por geração)")
+                st.line_chart(curves)
+
+# Seção de planejamento com vários veículos
+with st.expander("Múltiplos Veículos"):
+    if data is not None:
+        st.write("Capacidade de cada caminhão")
+        caminhoes = st.data_editor(
+            pd.DataFrame({"Peso": [6000] * 3, "Volume": [350] * 3}),
+            num_rows="dynamic",
+            key="caminhoes",
+        )
+        limite_busca = st.number_input(
+            "Tempo da Busca Local (segundos, 0 = somente gulosa)",
+            min_value=0,
+            value=5,
+        )
+        planejar_button = st.button("Planejar Frota")
+        if planejar_button and len(caminhoes.dropna()) > 0:
+            items = ItemArrays.from_frame(data)
+            capacities = caminhoes.dropna()[["Peso", "Volume"]].to_numpy()
+            fleet = plan_fleet(
+                items,
+                capacities,
+                time_limit=limite_busca,
+                local_search=limite_busca > 0,
+            )
+            plano = data.assign(CAMINHAO=fleet.assignment + 1)[
+                fleet.assignment >= 0
+            ]
+            st.dataframe(
+                fleet_summary(items, capacities, fleet.assignment),
+                hide_index=True,
+            )
+            AgGrid(plano)
+            st.write(f"Itens Carregados: {len(plano)} de {len(data)}")
+            st.write(f"Valor Total: {fleet.value:,.0f}")
+            st.write(
+                f"Valor da Solução Gulosa: {fleet.greedy_value:,.0f} "
+                f"({fleet.swaps} trocas na busca local)"
+            )
+            st.write(
+                f"Tempo: {fleet.seconds:.2f} s "
+                f"({len(data) / max(fleet.seconds, 1e-9):,.0f} itens/s)"
+            )
+            st.download_button(
+                label="Exportar Plano como CSV",
+                data=plano.to_csv(index=False, sep=";"),
+                file_name="plano_frota.csv",
+                mime="text/csv",
+            )
@@ -0,0 +1,282 @@
+"""
+Solução exata da carga com duas restrições (peso e volume).
+
+O método principal é um branch-and-bound em profundidade com limites da
+relaxação linear, obtidos por relaxação substituta: as duas restrições são
+combinadas numa só e o limite fracionário de Dantzig é calculado nessa
+restrição combinada. Para capacidades inteiras pequenas, a programação
+dinâmica sobre a grade peso x volume também está disponível. Com limite de
+tempo, devolve a melhor carga encontrada e o gap de otimalidade em relação ao
+limite superior.
+"""
+
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+from fitness import ItemArrays
+
+# Tamanho máximo (em células) da tabela de decisões da programação dinâmica
+DP_MAX_CELLS = 50_000_000
+
+# Estimativa conservadora da vazão da programação dinâmica, usada para
+# decidir se ela cabe no tempo que sobra depois do branch-and-bound
+DP_CELLS_PER_SECOND = 50_000_000
+
+
+@dataclass
+class SolverResult:
+    """Carga encontrada por um dos métodos de otimização."""
+
+    selected: np.ndarray
+    value: float
+    upper_bound: float
+    seconds: float
+    method: str
+    nodes: int = 0
+
+    @property
+    def optimal(self) -> bool:
+        return self.value >= self.upper_bound - 1e-9
+
+    @property
+    def gap(self) -> float:
+        """Distância relativa entre a carga e o limite superior."""
+        if self.upper_bound <= 0:
+            return 0.0
+        return max(0.0, (self.upper_bound - self.value) / self.upper_bound)
+
+
+def _surrogate_weights(items, max_weight, max_volume, mu):
+    # Restrição combinada: (1 - mu) * peso/P + mu * volume/V <= 1
+    max_weight = max(max_weight, 1e-12)
+    max_volume = max(max_volume, 1e-12)
+    return (1 - mu) * items.weight / max_weight + mu * (
+        items.volume / max_volume
+    )
+
+
+def _dantzig_bound(values, weights, capacity):
+    """Limite fracionário da mochila de uma restrição."""
+    ratio = np.divide(
+        values, weights, out=np.full_like(values, np.inf), where=weights > 0
+    )
+    order = np.argsort(-ratio, kind="stable")
+    cum_weight = np.cumsum(weights[order])
+    k = np.searchsorted(cum_weight, capacity, side="right")
+    bound = values[order[:k]].sum()
+    if k < len(order):
+        used = cum_weight[k - 1] if k > 0 else 0.0
+        bound += values[order[k]] * (capacity - used) / weights[order[k]]
+    return bound
+
+
+def lp_upper_bound(items: ItemArrays, max_weight, max_volume, grid=101):
+    """
+    Limite superior da relaxação linear e o multiplicador que o atinge.
+
+    O mínimo, sobre os multiplicadores da grade, do limite de Dantzig da
+    restrição combinada coincide (a menos da grade) com o ótimo da relaxação
+    linear das duas restrições.
+    """
+    fits = (items.weight <= max_weight) & (items.volume <= max_volume)
+    values = np.where(fits, items.value, 0.0)
+    best_bound, best_mu = np.inf, 0.0
+    for mu in np.linspace(0.0, 1.0, grid):
+        weights = _surrogate_weights(items, max_weight, max_volume, mu)
+        bound = _dantzig_bound(values, weights, 1.0)
+        if bound < best_bound:
+            best_bound, best_mu = bound, mu
+    return best_bound, best_mu
+
+
+def _solve_dp(items, max_weight, max_volume, start, deadline=None):
+    # Com deadline, desiste (devolve None) se o prazo passar no meio da tabela
+    weights = items.weight.astype(np.int64)
+    volumes = items.volume.astype(np.int64)
+    W, V = int(max_weight), int(max_volume)
+    best = np.zeros((W + 1, V + 1))
+    take = np.zeros((len(items), W + 1, V + 1), dtype=bool)
+    for i, (w, v, value) in enumerate(zip(weights, volumes, items.value)):
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        if w > W or v > V:
+            continue
+        candidate = best[: W + 1 - w, : V + 1 - v] + value
+        improved = candidate > best[w:, v:]
+        take[i, w:, v:] = improved
+        best[w:, v:] = np.where(improved, candidate, best[w:, v:])
+
+    selected = np.zeros(len(items), dtype=bool)
+    w, v = W, V
+    for i in range(len(items) - 1, -1, -1):
+        if take[i, w, v]:
+            selected[i] = True
+            w -= weights[i]
+            v -= volumes[i]
+    value = float(best[W, V])
+    return SolverResult(
+        selected=selected,
+        value=value,
+        upper_bound=value,
+        seconds=time.perf_counter() - start,
+        method="Programação Dinâmica",
+    )
+
+
+def _solve_branch_and_bound(
+    items, max_weight, max_volume, time_limit, start
+):
+    n = len(items)
+    root_bound, mu = lp_upper_bound(items, max_weight, max_volume)
+    surrogate = _surrogate_weights(items, max_weight, max_volume, mu)
+    ratio = np.divide(
+        items.value,
+        surrogate,
+        out=np.full(n, np.inf),
+        where=surrogate > 0,
+    )
+    order = np.argsort(-ratio, kind="stable")
+
+    # Listas Python são mais rápidas que arrays para o acesso item a item
+    values = items.value[order].tolist()
+    weights = items.weight[order].tolist()
+    volumes = items.volume[order].tolist()
+    surr = surrogate[order].tolist()
+    cum_surr = [0.0] + np.cumsum(surrogate[order]).tolist()
+    cum_value = [0.0] + np.cumsum(items.value[order]).tolist()
+    integral = bool(np.all(items.value == np.round(items.value)))
+
+    def bound(i, value, surrogate_used):
+        # Limite de Dantzig na restrição combinada para os itens i..n-1
+        target = cum_surr[i] + 1.0 - surrogate_used
+        k = bisect_right(cum_surr, target, lo=i) - 1
+        result = value + cum_value[k] - cum_value[i]
+        if k < n and surr[k] > 0:
+            result += values[k] * (target - cum_surr[k]) / surr[k]
+        return np.floor(result + 1e-9) if integral else result
+
+    # Solução inicial gulosa na ordem da restrição combinada
+    best_value, best_path = 0.0, None
+    weight = volume = 0.0
+    for i in range(n):
+        if weight + weights[i] <= max_weight and (
+            volume + volumes[i] <= max_volume
+        ):
+            weight += weights[i]
+            volume += volumes[i]
+            best_value += values[i]
+            best_path = (i, best_path)
+
+    # Pilha de nós: (próximo item, valor, peso, volume, combinada, caminho)
+    stack = [(0, 0.0, 0.0, 0.0, 0.0, None)]
+    nodes = 0
+    timed_out = False
+    while stack:
+        nodes += 1
+        if nodes % 4096 == 0 and time.perf_counter() - start > time_limit:
+            timed_out = True
+            break
+        i, value, weight, volume, used, path = stack.pop()
+        if i == n:
+            if value > best_value:
+                best_value, best_path = value, path
+            continue
+        if bound(i, value, used) <= best_value + 1e-9:
+            continue
+        # O ramo sem o item é empilhado primeiro para que o ramo com o item
+        # (mais promissor pela ordenação) seja explorado antes
+        stack.append((i + 1, value, weight, volume, used, path))
+        if weight + weights[i] <= max_weight and (
+            volume + volumes[i] <= max_volume
+        ):
+            stack.append(
+                (
+                    i + 1,
+                    value + values[i],
+                    weight + weights[i],
+                    volume + volumes[i],
+                    used + surr[i],
+                    (i, path),
+                )
+            )
+
+    if timed_out:
+        open_bound = max(
+            bound(node[0], node[1], node[4]) if node[0] < n else node[1]
+            for node in stack
+        )
+        upper_bound = min(root_bound, max(best_value, open_bound))
+    else:
+        upper_bound = best_value
+
+    selected = np.zeros(n, dtype=bool)
+    while best_path is not None:
+        i, best_path = best_path
+        selected[order[i]] = True
+    return SolverResult(
+        selected=selected,
+        value=float(best_value),
+        upper_bound=float(upper_bound),
+        seconds=time.perf_counter() - start,
+        method="Branch and Bound",
+        nodes=nodes,
+    )
+
+
+def dp_cells(items: ItemArrays, max_weight, max_volume) -> int:
+    """Células da tabela de decisões da programação dinâmica."""
+    return len(items) * (int(max_weight) + 1) * (int(max_volume) + 1)
+
+
+def dp_applicable(items: ItemArrays, max_weight, max_volume) -> bool:
+    """Peso, volume e capacidades inteiros e tabela dentro de DP_MAX_CELLS."""
+    integral = all(
+        np.all(array == np.round(array))
+        for array in (items.weight, items.volume, [max_weight, max_volume])
+    )
+    if not integral or max_weight < 0 or max_volume < 0:
+        return False
+    return dp_cells(items, max_weight, max_volume) <= DP_MAX_CELLS
+
+
+def solve_exact(
+    items: ItemArrays, max_weight, max_volume, time_limit=30.0, method="auto"
+) -> SolverResult:
+    """
+    Resolve a carga de forma exata dentro do limite de tempo (segundos).
+
+    method pode ser "bb" (branch-and-bound), "dp" (programação dinâmica) ou
+    "auto": branch-and-bound e, se o tempo acabar sem prova de otimalidade,
+    programação dinâmica quando ela for aplicável e a estimativa do seu
+    custo couber no tempo restante. A programação dinâmica do "auto" também
+    respeita o limite; quando ela não roda ou não termina, o resultado é a
+    melhor carga do branch-and-bound, sem prova de otimalidade (gap > 0).
+    """
+    start = time.perf_counter()
+    if method == "dp":
+        if not dp_applicable(items, max_weight, max_volume):
+            raise ValueError(
+                "Programação dinâmica exige pesos, volumes e capacidades "
+                "inteiros e uma tabela menor que DP_MAX_CELLS"
+            )
+        return _solve_dp(items, max_weight, max_volume, start)
+    result = _solve_branch_and_bound(
+        items, max_weight, max_volume, time_limit, start
+    )
+    if (
+        method != "auto"
+        or result.optimal
+        or not dp_applicable(items, max_weight, max_volume)
+    ):
+        return result
+    remaining = time_limit - (time.perf_counter() - start)
+    estimate = dp_cells(items, max_weight, max_volume) / DP_CELLS_PER_SECOND
+    if estimate > remaining:
+        return result
+    exact = _solve_dp(
+        items, max_weight, max_volume, start, deadline=start + time_limit
+    )
+    return exact if exact is not None else result
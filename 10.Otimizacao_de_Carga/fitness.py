@@ -0,0 +1,65 @@
+"""
+Avaliação vetorizada da função de aptidão da otimização de carga.
+
+A tabela de itens é convertida uma única vez em arrays NumPy. A aptidão de um
+cromossomo passa a ser um produto escalar, e a de uma população inteira, um
+único produto de matrizes.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Valor devolvido para cargas que excedem o peso ou o volume disponíveis
+INFEASIBLE = -1
+
+
+@dataclass(frozen=True)
+class ItemArrays:
+    """
+    Colunas PESO, VOLUME e VALOR da tabela de itens como arrays.
+
+    matrix guarda as três colunas como linhas de uma matriz (3, itens), de
+    modo que weight, volume e value são visões contíguas dela.
+    """
+
+    matrix: np.ndarray
+
+    @classmethod
+    def from_frame(cls, data):
+        matrix = np.ascontiguousarray(
+            data[["PESO", "VOLUME", "VALOR"]].to_numpy(dtype=np.float64).T
+        )
+        return cls(matrix=matrix)
+
+    @property
+    def weight(self) -> np.ndarray:
+        return self.matrix[0]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.matrix[1]
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.matrix[2]
+
+    def __len__(self):
+        return self.matrix.shape[1]
+
+
+def fitness_function(X, items: ItemArrays, max_volume, max_weight):
+    """Aptidão de um cromossomo: -valor da carga, ou -1 se inviável."""
+    X = np.asarray(X, dtype=np.float64)
+    if X @ items.weight > max_weight or X @ items.volume > max_volume:
+        return INFEASIBLE
+    return -(X @ items.value)
+
+
+def population_fitness(population, items: ItemArrays, max_volume, max_weight):
+    """Aptidão de uma população (cromossomos, itens) num só produto."""
+    weight, volume, value = items.matrix @ np.asarray(
+        population, dtype=np.float64
+    ).T
+    feasible = (weight <= max_weight) & (volume <= max_volume)
+    return np.where(feasible, -value, INFEASIBLE)
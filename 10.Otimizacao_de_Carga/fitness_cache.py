@@ -0,0 +1,101 @@
+"""
+Cache da aptidão dos cromossomos já avaliados.
+
+Com elitismo e mutação baixa, o algoritmo genético reavalia os mesmos
+cromossomos muitas vezes. A aptidão fica guardada num cache LRU limitado,
+indexado pelo cromossomo compactado em bits (np.packbits), e só os
+cromossomos inéditos são avaliados, todos de uma vez.
+
+Nas medições (benchmark_cache.py), o cache evita de 33% a 60% das avaliações,
+mas não reduz o tempo: compactar e procurar cada cromossomo custa mais que a
+aptidão vetorizada (um produto de matrizes), tanto com os 20 itens de
+Itens.csv quanto com 100 mil itens. Por isso ele é opcional no app; só
+compensa se a aptidão passar a ser cara de calcular.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from fitness import ItemArrays, population_fitness
+
+
+# Custo aproximado de cada entrada além da chave: objeto bytes, float e nó
+# do OrderedDict
+ENTRY_OVERHEAD = 150
+
+
+class FitnessCache:
+    """
+    Avaliação de populações com memorização da aptidão.
+
+    O cache vale para uma tabela de itens e um par de capacidades; uma nova
+    execução com outras sobras precisa de um novo cache.
+
+    Parâmetros:
+    - max_bytes: memória máxima ocupada pelas chaves (itens / 8 bytes por
+      cromossomo, mais ENTRY_OVERHEAD). Ao atingir o limite, os menos usados
+      recentemente são descartados.
+    """
+
+    def __init__(
+        self, items: ItemArrays, max_weight, max_volume, max_bytes=64 * 1024**2
+    ):
+        self.items = items
+        self.max_weight = max_weight
+        self.max_volume = max_volume
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._entry_bytes = (len(items) + 7) // 8 + ENTRY_OVERHEAD
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def evaluate(self, population) -> np.ndarray:
+        """Aptidão de cada cromossomo da população (cromossomos, itens)."""
+        population = np.asarray(population, dtype=bool)
+        keys = [row.tobytes() for row in np.packbits(population, axis=1)]
+        fitness = np.empty(len(keys))
+        missing = {}
+        for idx, key in enumerate(keys):
+            value = self._entries.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(idx)
+            else:
+                self._entries.move_to_end(key)
+                fitness[idx] = value
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            values = population_fitness(
+                population[first], self.items, self.max_volume, self.max_weight
+            )
+            for (key, positions), value in zip(missing.items(), values):
+                fitness[positions] = value
+                self._entries[key] = value
+            while self.total_bytes > self.max_bytes:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return fitness
+
+    @property
+    def total_bytes(self) -> int:
+        return len(self._entries) * self._entry_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Acertos, avaliações reais e ocupação do cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,228 @@
+"""
+Algoritmo genético binário vetorizado para a otimização de carga.
+
+Segue os mesmos parâmetros do pacote geneticalgorithm (tamanho da população,
+probabilidade de mutação, proporção de elite, probabilidade de cruzamento,
+proporção de pais e cruzamento uniforme), mas avalia a população inteira de
+uma vez com population_fitness e evolui em blocos de gerações, o que permite
+rodar várias populações em paralelo e trocar indivíduos entre elas.
+"""
+
+import time
+from dataclasses import dataclass, fields
+from functools import partial
+
+import numpy as np
+
+from fitness import ItemArrays, population_fitness
+
+
+@dataclass(frozen=True)
+class GAParameters:
+    """Parâmetros do algoritmo genético."""
+
+    population_size: int = 10
+    mutation_probability: float = 0.1
+    elit_ratio: float = 0.01
+    crossover_probability: float = 0.5
+    parents_portion: float = 0.3
+
+    @classmethod
+    def from_dict(cls, algorithm_param: dict):
+        """Aproveita o dicionário algorithm_param do geneticalgorithm."""
+        names = {field.name for field in fields(cls)}
+        return cls(
+            **{k: v for k, v in algorithm_param.items() if k in names}
+        )
+
+
+def initial_population(
+    items: ItemArrays, max_weight, max_volume, size, rng
+) -> np.ndarray:
+    """
+    População inicial aleatória.
+
+    A densidade de itens escolhidos acompanha a fração da carga que cabe na
+    sobra, para que a maior parte dos cromossomos iniciais seja viável.
+    """
+    density = min(
+        0.5,
+        max_weight / max(items.weight.sum(), 1e-12),
+        max_volume / max(items.volume.sum(), 1e-12),
+    )
+    return rng.random((size, len(items))) < density
+
+
+def next_generation(population, fitness, params: GAParameters, rng):
+    """Seleção, cruzamento uniforme e mutação de uma geração."""
+    size, dimension = population.shape
+    order = np.argsort(fitness, kind="stable")
+    population, fitness = population[order], fitness[order]
+
+    num_elit = 0
+    if params.elit_ratio > 0:
+        num_elit = max(1, int(params.elit_ratio * size))
+    num_parents = min(size, max(int(params.parents_portion * size), num_elit))
+
+    # Seleção por roleta, como no geneticalgorithm (minimização)
+    norm = fitness.max() - fitness + 1
+    chosen = rng.choice(size, num_parents - num_elit, p=norm / norm.sum())
+    parents = np.concatenate([population[:num_elit], population[chosen]])
+    if len(parents) == 0:
+        parents = population[:1]
+
+    num_children = size - len(parents)
+    first = parents[rng.integers(len(parents), size=num_children)]
+    second = parents[rng.integers(len(parents), size=num_children)]
+    crossover = rng.random(num_children) < params.crossover_probability
+    swap = rng.random((num_children, dimension)) < 0.5
+    children = np.where(swap & crossover[:, None], second, first)
+    children ^= rng.random(children.shape) < params.mutation_probability
+    return np.concatenate([parents, children])
+
+
+def evolve(
+    population,
+    items: ItemArrays,
+    max_weight,
+    max_volume,
+    params: GAParameters,
+    generations,
+    rng,
+):
+    """
+    Evolui a população por algumas gerações.
+
+    Retorna a população final, a aptidão de cada cromossomo e o histórico
+    (gerações, 2) com a melhor e a média da aptidão de cada geração.
+    """
+    fitness = population_fitness(population, items, max_volume, max_weight)
+    history = np.empty((generations, 2))
+    for generation in range(generations):
+        population = next_generation(population, fitness, params, rng)
+        fitness = population_fitness(
+            population, items, max_volume, max_weight
+        )
+        history[generation] = fitness.min(), fitness.mean()
+    return population, fitness, history
+
+
+def repair(population, items: ItemArrays, max_weight, max_volume):
+    """
+    Torna viáveis os cromossomos que excedem peso ou volume.
+
+    Retira de cada cromossomo inviável os itens de menor valor por unidade de
+    capacidade ocupada, até que a carga caiba nas duas restrições.
+    """
+    population = np.array(population, dtype=bool)
+    weight = population @ items.weight
+    volume = population @ items.volume
+    infeasible = np.flatnonzero((weight > max_weight) | (volume > max_volume))
+    if len(infeasible) == 0:
+        return population
+
+    load = items.weight / max(max_weight, 1e-12) + items.volume / max(
+        max_volume, 1e-12
+    )
+    order = np.argsort(items.value / np.maximum(load, 1e-12), kind="stable")
+    for idx in infeasible:
+        chosen = order[population[idx, order]]
+        removed_weight = np.cumsum(items.weight[chosen])
+        removed_volume = np.cumsum(items.volume[chosen])
+        fits = (weight[idx] - removed_weight <= max_weight) & (
+            volume[idx] - removed_volume <= max_volume
+        )
+        count = int(np.argmax(fits)) + 1 if fits.any() else len(chosen)
+        population[idx, chosen[:count]] = False
+    return population
+
+
+@dataclass
+class GAResult:
+    """Resultado de uma execução do algoritmo genético."""
+
+    selected: np.ndarray
+    fitness: float
+    population: np.ndarray
+    history: np.ndarray
+    stopped_early: bool
+    seconds: float
+
+
+def run_ga(
+    items: ItemArrays,
+    max_weight,
+    max_volume,
+    params: GAParameters,
+    max_num_iteration,
+    max_iteration_without_improv=None,
+    previous_population=None,
+    on_generation=None,
+    seed=None,
+    cache=None,
+) -> GAResult:
+    """
+    Executa o algoritmo genético geração a geração.
+
+    Parâmetros:
+    - max_iteration_without_improv: encerra a busca após esse número de
+      gerações sem melhora da melhor aptidão (None desativa).
+    - previous_population: população de uma execução anterior. Os
+      cromossomos são reparados para as capacidades atuais e completados com
+      cromossomos aleatórios até o tamanho da população.
+    - on_generation: chamada a cada geração com (geração, melhor, média).
+    - cache: FitnessCache usado para não reavaliar cromossomos repetidos.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    population = initial_population(
+        items, max_weight, max_volume, params.population_size, rng
+    )
+    if previous_population is not None:
+        seeded = repair(
+            previous_population[: params.population_size],
+            items,
+            max_weight,
+            max_volume,
+        )
+        population[: len(seeded)] = seeded
+
+    evaluate = (
+        cache.evaluate
+        if cache is not None
+        else partial(
+            population_fitness,
+            items=items,
+            max_volume=max_volume,
+            max_weight=max_weight,
+        )
+    )
+    fitness = evaluate(population)
+    history = []
+    best, stall = fitness.min(), 0
+    stopped_early = False
+    for generation in range(max_num_iteration):
+        population = next_generation(population, fitness, params, rng)
+        fitness = evaluate(population)
+        history.append((fitness.min(), fitness.mean()))
+        if on_generation is not None:
+            on_generation(generation, *history[-1])
+        if fitness.min() < best:
+            best, stall = fitness.min(), 0
+        else:
+            stall += 1
+        if max_iteration_without_improv and (
+            stall >= max_iteration_without_improv
+        ):
+            stopped_early = True
+            break
+
+    idx = int(np.argmin(fitness))
+    return GAResult(
+        selected=population[idx].astype(bool),
+        fitness=float(fitness[idx]),
+        population=population,
+        history=np.array(history).reshape(-1, 2),
+        stopped_early=stopped_early,
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,134 @@
+"""
+Algoritmo genético em ilhas, com uma população por núcleo de CPU.
+
+Cada ilha evolui de forma independente num processo do pool. A cada
+migration_interval gerações, os melhores indivíduos de cada ilha migram para
+a ilha seguinte (topologia em anel), substituindo os piores de lá.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from fitness import ItemArrays, population_fitness
+from ga_engine import GAParameters, evolve, initial_population
+
+# Dados do problema, enviados uma única vez para cada processo do pool
+_problem = None
+
+
+@dataclass
+class IslandResult:
+    """Melhor carga entre todas as ilhas e as curvas de convergência."""
+
+    selected: np.ndarray
+    fitness: float
+    curves: np.ndarray
+    seconds: float
+
+    @property
+    def best_island(self) -> int:
+        return int(np.argmin(self.curves[:, -1]))
+
+
+def _init_worker(items, max_weight, max_volume, params):
+    global _problem
+    _problem = (items, max_weight, max_volume, params)
+
+
+def _evolve_island(population, generations, seed):
+    items, max_weight, max_volume, params = _problem
+    rng = np.random.default_rng(seed)
+    return evolve(
+        population, items, max_weight, max_volume, params, generations, rng
+    )
+
+
+def _migrate(populations, fitnesses, migrants):
+    # Os melhores de cada ilha substituem os piores da ilha seguinte
+    best = [
+        population[np.argsort(fitness, kind="stable")[:migrants]]
+        for population, fitness in zip(populations, fitnesses)
+    ]
+    for idx, (population, fitness) in enumerate(zip(populations, fitnesses)):
+        incoming = best[idx - 1]
+        worst = np.argsort(fitness, kind="stable")[::-1][: len(incoming)]
+        population[worst] = incoming
+    return populations
+
+
+def run_islands(
+    items: ItemArrays,
+    max_weight,
+    max_volume,
+    params: GAParameters,
+    generations,
+    n_islands=None,
+    migration_interval=10,
+    migrants=1,
+    seed=None,
+    max_workers=None,
+) -> IslandResult:
+    """
+    Roda n_islands populações em paralelo por generations gerações.
+
+    Retorna a melhor carga encontrada e, para cada ilha, a curva da melhor
+    aptidão por geração.
+    """
+    start = time.perf_counter()
+    n_islands = n_islands or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(n_islands)
+    rngs = [np.random.default_rng(s) for s in seeds]
+    populations = [
+        initial_population(
+            items, max_weight, max_volume, params.population_size, rng
+        )
+        for rng in rngs
+    ]
+    # Com zero gerações, o resultado é o melhor das populações iniciais
+    fitnesses = [
+        population_fitness(population, items, max_volume, max_weight)
+        for population in populations
+    ]
+    curves = [[] for _ in range(n_islands)]
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers or min(n_islands, os.cpu_count() or 1),
+        initializer=_init_worker,
+        initargs=(items, max_weight, max_volume, params),
+    ) as pool:
+        done = 0
+        while done < generations:
+            epoch = min(migration_interval, generations - done)
+            futures = [
+                pool.submit(
+                    _evolve_island,
+                    population,
+                    epoch,
+                    rng.integers(2**63),
+                )
+                for population, rng in zip(populations, rngs)
+            ]
+            for idx, future in enumerate(futures):
+                populations[idx], fitnesses[idx], history = future.result()
+                curves[idx].append(history[:, 0])
+            done += epoch
+            if done < generations and n_islands > 1:
+                populations = _migrate(populations, fitnesses, migrants)
+
+    best_fitness, best_chromosome = np.inf, None
+    for population, fitness in zip(populations, fitnesses):
+        idx = int(np.argmin(fitness))
+        if fitness[idx] < best_fitness:
+            best_fitness, best_chromosome = fitness[idx], population[idx]
+    return IslandResult(
+        selected=best_chromosome.astype(bool),
+        fitness=float(best_fitness),
+        curves=np.array(
+            [np.concatenate(curve) if curve else [] for curve in curves]
+        ),
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,228 @@
+"""
+Planejamento de carga com vários veículos.
+
+Cada item é atribuído a no máximo um caminhão, respeitando o peso e o
+volume de cada um. A atribuição inicial é gulosa (melhor encaixe, na ordem
+de valor por capacidade ocupada) e depois melhorada por busca local com
+trocas entre itens fora da carga e itens de baixo valor já carregados. Todo
+o trabalho é O(itens x caminhões) por passada, o que permite planilhas com
+100 mil itens.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fitness import ItemArrays
+
+# Quantidade de candidatos considerados em cada troca da busca local
+SWAP_CANDIDATES = 64
+
+
+@dataclass
+class FleetResult:
+    """Atribuição de itens a caminhões (-1 para itens não carregados)."""
+
+    assignment: np.ndarray
+    value: float
+    greedy_value: float
+    swaps: int
+    seconds: float
+
+
+def _density_order(items: ItemArrays, capacities):
+    # Valor por fração da capacidade total da frota ocupada pelo item
+    total_weight = max(capacities[:, 0].sum(), 1e-12)
+    total_volume = max(capacities[:, 1].sum(), 1e-12)
+    load = items.weight / total_weight + items.volume / total_volume
+    density = items.value / np.maximum(load, 1e-12)
+    return np.argsort(-density, kind="stable"), density
+
+
+def greedy_assignment(items: ItemArrays, capacities):
+    """
+    Atribuição gulosa por melhor encaixe.
+
+    Os itens são percorridos do maior para o menor valor por capacidade, e
+    cada um vai para o caminhão em que cabe deixando a menor folga.
+    """
+    order, _ = _density_order(items, capacities)
+    n_trucks = len(capacities)
+    scale_w = 1 / max(capacities[:, 0].max(), 1e-12)
+    scale_v = 1 / max(capacities[:, 1].max(), 1e-12)
+    remaining_w = capacities[:, 0].astype(float).tolist()
+    remaining_v = capacities[:, 1].astype(float).tolist()
+    weights = items.weight.tolist()
+    volumes = items.volume.tolist()
+    assignment = np.full(len(items), -1, dtype=np.int64)
+    min_weight = items.weight.min() if len(items) else 0.0
+    min_volume = items.volume.min() if len(items) else 0.0
+
+    for idx in order.tolist():
+        w, v = weights[idx], volumes[idx]
+        best, best_slack = -1, np.inf
+        for truck in range(n_trucks):
+            rw, rv = remaining_w[truck] - w, remaining_v[truck] - v
+            if rw >= 0 and rv >= 0:
+                slack = rw * scale_w + rv * scale_v
+                if slack < best_slack:
+                    best, best_slack = truck, slack
+        if best >= 0:
+            assignment[idx] = best
+            remaining_w[best] -= w
+            remaining_v[best] -= v
+            # Frota cheia: nenhum item restante cabe em nenhum caminhão
+            if max(remaining_w) < min_weight or max(remaining_v) < min_volume:
+                break
+    return assignment
+
+
+def _fill(items, capacities, assignment, order):
+    # Insere itens não carregados onde ainda houver espaço
+    loaded = assignment >= 0
+    remaining_w = capacities[:, 0] - np.bincount(
+        assignment[loaded],
+        weights=items.weight[loaded],
+        minlength=len(capacities),
+    )
+    remaining_v = capacities[:, 1] - np.bincount(
+        assignment[loaded],
+        weights=items.volume[loaded],
+        minlength=len(capacities),
+    )
+    # Só percorre os itens que cabem em algum caminhão neste momento
+    candidates = order[~loaded[order]]
+    fits_any = (
+        (items.weight[candidates][:, None] <= remaining_w[None])
+        & (items.volume[candidates][:, None] <= remaining_v[None])
+    ).any(axis=1)
+    candidates = candidates[fits_any]
+    for idx in candidates:
+        fits = (items.weight[idx] <= remaining_w) & (
+            items.volume[idx] <= remaining_v
+        )
+        if fits.any():
+            truck = int(np.argmax(fits))
+            assignment[idx] = truck
+            remaining_w[truck] -= items.weight[idx]
+            remaining_v[truck] -= items.volume[idx]
+    return remaining_w, remaining_v
+
+
+def _swap_candidates(assignment, density, n_trucks):
+    # Para cada caminhão, os itens carregados de menor valor por capacidade
+    loaded = np.flatnonzero(assignment >= 0)
+    loaded = loaded[np.lexsort((density[loaded], assignment[loaded]))]
+    bounds = np.searchsorted(assignment[loaded], np.arange(n_trucks + 1))
+    return [
+        loaded[bounds[truck] : bounds[truck + 1]][:SWAP_CANDIDATES]
+        for truck in range(n_trucks)
+    ]
+
+
+def improve(items, capacities, assignment, time_limit=5.0, start=None):
+    """
+    Busca local por trocas 1x1 entre itens fora e dentro de cada caminhão.
+
+    Em cada passada, compara os SWAP_CANDIDATES itens fora da carga de maior
+    valor por capacidade com os SWAP_CANDIDATES de menor valor por
+    capacidade de cada caminhão e aplica, em cada caminhão, a troca viável
+    de maior ganho. As passadas se repetem enquanto houver ganho.
+    """
+    start = start or time.perf_counter()
+    order, density = _density_order(items, capacities)
+    remaining_w, remaining_v = _fill(items, capacities, assignment, order)
+    swaps = 0
+    while time.perf_counter() - start < time_limit:
+        outside = order[assignment[order] < 0][:SWAP_CANDIDATES]
+        if len(outside) == 0:
+            break
+        available = np.ones(len(outside), dtype=bool)
+        pass_swaps = 0
+        candidates = _swap_candidates(assignment, density, len(capacities))
+        for truck, inside in enumerate(candidates):
+            if len(inside) == 0:
+                continue
+            # Matriz de ganhos (fora x dentro) das trocas viáveis
+            gain = items.value[outside][:, None] - items.value[inside][None]
+            feasible = (
+                available[:, None]
+                & (
+                    items.weight[outside][:, None]
+                    <= remaining_w[truck] + items.weight[inside][None]
+                )
+                & (
+                    items.volume[outside][:, None]
+                    <= remaining_v[truck] + items.volume[inside][None]
+                )
+            )
+            gain = np.where(feasible, gain, 0.0)
+            row, col = np.unravel_index(np.argmax(gain), gain.shape)
+            if gain[row, col] <= 0:
+                continue
+            item_in, item_out = outside[row], inside[col]
+            assignment[item_in] = truck
+            assignment[item_out] = -1
+            available[row] = False
+            pass_swaps += 1
+        if pass_swaps == 0:
+            break
+        swaps += pass_swaps
+        # As trocas podem ter liberado espaço para itens menores
+        remaining_w, remaining_v = _fill(items, capacities, assignment, order)
+    return swaps
+
+
+def plan_fleet(
+    items: ItemArrays, capacities, time_limit=5.0, local_search=True
+) -> FleetResult:
+    """
+    Distribui os itens entre os caminhões.
+
+    Parâmetros:
+    - capacities: array (caminhões, 2) com peso e volume de cada caminhão.
+    - time_limit: tempo máximo, em segundos, da busca local.
+    """
+    start = time.perf_counter()
+    capacities = np.asarray(capacities, dtype=np.float64).reshape(-1, 2)
+    assignment = greedy_assignment(items, capacities)
+    greedy_value = float(items.value[assignment >= 0].sum())
+    swaps = 0
+    if local_search:
+        swaps = improve(items, capacities, assignment, time_limit, start)
+    return FleetResult(
+        assignment=assignment,
+        value=float(items.value[assignment >= 0].sum()),
+        greedy_value=greedy_value,
+        swaps=swaps,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def fleet_summary(items: ItemArrays, capacities, assignment) -> pd.DataFrame:
+    """Itens, peso, volume, valor e ocupação de cada caminhão."""
+    capacities = np.asarray(capacities, dtype=np.float64).reshape(-1, 2)
+    loaded = assignment >= 0
+    n_trucks = len(capacities)
+
+    def total(values):
+        return np.bincount(
+            assignment[loaded], weights=values[loaded], minlength=n_trucks
+        )
+
+    weight, volume = total(items.weight), total(items.volume)
+    return pd.DataFrame(
+        {
+            "Caminhão": np.arange(1, n_trucks + 1),
+            "Itens": np.bincount(assignment[loaded], minlength=n_trucks),
+            "Peso": weight,
+            "Capacidade Peso": capacities[:, 0],
+            "Ocupação Peso": weight / np.maximum(capacities[:, 0], 1e-12),
+            "Volume": volume,
+            "Capacidade Volume": capacities[:, 1],
+            "Ocupação Volume": volume / np.maximum(capacities[:, 1], 1e-12),
+            "Valor": total(items.value),
+        }
+    )
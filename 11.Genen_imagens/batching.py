@@ -0,0 +1,294 @@
+"""
+Fila de geração compartilhada entre as sessões do servidor Streamlit.
+
+Os pedidos de todas as sessões entram numa única fila. Um worker agrupa os
+pedidos compatíveis (mesmo modelo, tamanho, passos e escala de orientação)
+numa única chamada ao pipeline e devolve cada imagem à sessão que a pediu.
+"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from cpu_performance import PERFORMANCE_MODES, inference_context
+from model_registry import ModelKey, registry
+from previews import (
+    GenerationCancelled,
+    GenerationProgress,
+    make_step_callback,
+)
+from prompt_cache import prompt_cache
+
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    """Parâmetros de uma geração pedida por uma sessão."""
+
+    prompt: str
+    negative_prompt: str
+    num_images_per_prompt: int
+    num_inference_steps: int
+    height: int
+    width: int
+    seed: int
+    guidance_scale: float
+    model_key: ModelKey
+
+    @property
+    def batch_key(self):
+        """Pedidos com a mesma chave podem ser gerados juntos."""
+        return (
+            self.model_key,
+            self.height,
+            self.width,
+            self.num_inference_steps,
+            self.guidance_scale,
+        )
+
+
+@dataclass
+class _Pending:
+    request: GenerationRequest
+    future: Future
+    enqueued: float
+    progress: GenerationProgress
+
+
+def make_pipeline_runner(
+    model_registry=registry, embeddings_cache=prompt_cache
+):
+    """
+    Cria a função que gera um lote de pedidos compatíveis com o pipeline.
+
+    Os latentes iniciais de cada pedido são sorteados com o seu próprio
+    gerador, de modo que o resultado é o mesmo de uma geração isolada.
+    """
+
+    def run_batch(requests, progresses):
+        import torch
+
+        first = requests[0]
+        key = first.model_key
+        with model_registry.use(key) as pipeline:
+            shape = (
+                pipeline.unet.config.in_channels,
+                first.height // pipeline.vae_scale_factor,
+                first.width // pipeline.vae_scale_factor,
+            )
+            latents = torch.cat(
+                [
+                    torch.randn(
+                        (request.num_images_per_prompt, *shape),
+                        generator=torch.Generator(
+                            device=key.device
+                        ).manual_seed(request.seed),
+                        device=key.device,
+                        dtype=pipeline.unet.dtype,
+                    )
+                    for request in requests
+                ]
+            )
+            image_counts = [
+                request.num_images_per_prompt for request in requests
+            ]
+            mode = PERFORMANCE_MODES[key.performance_mode]
+            with inference_context(mode, key.device):
+                # Embeddings de prompts já vistos vêm do cache, sem passar
+                # de novo pelo codificador de texto
+                prompt_embeds = embeddings_cache.encode(
+                    pipeline,
+                    key,
+                    [
+                        request.prompt
+                        for request in requests
+                        for _ in range(request.num_images_per_prompt)
+                    ],
+                )
+                negative_prompt_embeds = embeddings_cache.encode(
+                    pipeline,
+                    key,
+                    [
+                        request.negative_prompt
+                        for request in requests
+                        for _ in range(request.num_images_per_prompt)
+                    ],
+                )
+                images = pipeline(
+                    prompt_embeds=prompt_embeds,
+                    negative_prompt_embeds=negative_prompt_embeds,
+                    num_images_per_prompt=1,
+                    num_inference_steps=first.num_inference_steps,
+                    height=first.height,
+                    width=first.width,
+                    guidance_scale=first.guidance_scale,
+                    latents=latents,
+                    callback_on_step_end=make_step_callback(
+                        progresses,
+                        image_counts,
+                        first.num_inference_steps,
+                    ),
+                )["images"]
+
+        results = []
+        offset = 0
+        for count in image_counts:
+            results.append(images[offset : offset + count])
+            offset += count
+        return results
+
+    return run_batch
+
+
+class BatchScheduler:
+    """
+    Agrupa pedidos de várias sessões em chamadas em lote ao pipeline.
+
+    Parâmetros:
+    - run_batch: função que recebe uma lista de pedidos compatíveis e os
+      respectivos GenerationProgress e devolve as imagens de cada pedido.
+    - max_batch_size: número máximo de imagens por chamada ao pipeline.
+    - max_wait_seconds: tempo máximo que o primeiro pedido da fila espera por
+      outros pedidos compatíveis antes de o lote ser gerado.
+    """
+
+    def __init__(self, run_batch, max_batch_size=4, max_wait_seconds=0.1):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self.requests = 0
+        self.batches = 0
+        self.images = 0
+        self.served = 0
+        self.wait_seconds = 0.0
+        self.cancelled = 0
+        self.batch_sizes = Counter()
+
+    def submit(
+        self, request: GenerationRequest, progress: GenerationProgress = None
+    ) -> Future:
+        """Enfileira o pedido; o Future recebe a lista de imagens."""
+        future = Future()
+        if progress is None:
+            progress = GenerationProgress(preview_every=0)
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append(
+                _Pending(request, future, time.monotonic(), progress)
+            )
+            self.requests += 1
+            self._cond.notify()
+        return future
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._worker, name="batch-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _select(self):
+        # O lote é formado pelo pedido mais antigo e pelos compatíveis com
+        # ele, respeitando a ordem de chegada e o tamanho máximo do lote
+        first = self._pending[0]
+        batch = [first]
+        images = first.request.num_images_per_prompt
+        for item in self._pending[1:]:
+            count = item.request.num_images_per_prompt
+            if item.request.batch_key != first.request.batch_key:
+                continue
+            if images + count > self.max_batch_size:
+                break
+            batch.append(item)
+            images += count
+        return batch, images
+
+    def _drop_cancelled(self):
+        # Pedidos cancelados ainda na fila nem chegam ao pipeline
+        cancelled = [item for item in self._pending if item.progress.cancelled]
+        for item in cancelled:
+            self._pending.remove(item)
+            self.cancelled += 1
+            item.future.set_exception(GenerationCancelled())
+
+    def _next_batch(self):
+        with self._cond:
+            self._drop_cancelled()
+            while not self._pending:
+                self._cond.wait()
+                self._drop_cancelled()
+            deadline = self._pending[0].enqueued + self.max_wait_seconds
+            while True:
+                batch, images = self._select()
+                remaining = deadline - time.monotonic()
+                if images >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                self._drop_cancelled()
+                if not self._pending:
+                    return None
+            for item in batch:
+                self._pending.remove(item)
+            now = time.monotonic()
+            self.batches += 1
+            self.images += images
+            self.batch_sizes[images] += 1
+            self.served += len(batch)
+            self.wait_seconds += sum(now - item.enqueued for item in batch)
+            return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                continue
+            try:
+                results = self.run_batch(
+                    [item.request for item in batch],
+                    [item.progress for item in batch],
+                )
+            except Exception as e:
+                if isinstance(e, GenerationCancelled):
+                    with self._cond:
+                        self.cancelled += len(batch)
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            for item, images in zip(batch, results):
+                if item.progress.cancelled:
+                    with self._cond:
+                        self.cancelled += 1
+                    item.future.set_exception(GenerationCancelled())
+                else:
+                    item.future.set_result(images)
+
+    def stats(self) -> dict:
+        """Profundidade da fila e ocupação dos lotes, para ajuste fino."""
+        with self._cond:
+            capacity = self.batches * self.max_batch_size
+            return {
+                "queue_depth": len(self._pending),
+                "requests": self.requests,
+                "batches": self.batches,
+                "images": self.images,
+                "cancelled": self.cancelled,
+                "mean_batch_fill": self.images / capacity if capacity else 0.0,
+                "mean_wait_seconds": (
+                    self.wait_seconds / self.served if self.served else 0.0
+                ),
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+# Fila padrão, compartilhada por todas as sessões do processo
+batcher = BatchScheduler(
+    run_batch=make_pipeline_runner(registry, prompt_cache),
+    max_batch_size=4,
+    max_wait_seconds=0.1,
+)
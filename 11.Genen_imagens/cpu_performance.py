@@ -0,0 +1,89 @@
+"""
+Modos de desempenho para inferência do Stable Diffusion em CPU.
+
+Cada modo combina controle do número de threads, fatiamento da atenção,
+formato de memória channels-last, autocast em bfloat16 e compilação do UNet.
+O modo faz parte da ModelKey, pois altera o pipeline carregado.
+"""
+
+import os
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PerformanceMode:
+    """Otimizações aplicadas ao pipeline e a cada chamada de inferência."""
+
+    num_threads: int = 0
+    attention_slicing: bool = False
+    channels_last: bool = False
+    bfloat16: bool = False
+    compile: bool = False
+
+
+_CPU_THREADS = os.cpu_count() or 1
+
+PERFORMANCE_MODES = {
+    "padrao": PerformanceMode(),
+    "threads": PerformanceMode(num_threads=_CPU_THREADS),
+    "otimizado": PerformanceMode(
+        num_threads=_CPU_THREADS,
+        attention_slicing=True,
+        channels_last=True,
+    ),
+    "bfloat16": PerformanceMode(
+        num_threads=_CPU_THREADS,
+        attention_slicing=True,
+        channels_last=True,
+        bfloat16=True,
+    ),
+    "compilado": PerformanceMode(
+        num_threads=_CPU_THREADS,
+        attention_slicing=True,
+        channels_last=True,
+        compile=True,
+    ),
+}
+
+
+def bfloat16_supported() -> bool:
+    """Indica se a CPU tem instruções nativas para bfloat16."""
+    import torch
+
+    check = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+    return bool(check is not None and check())
+
+
+def apply_performance_mode(pipeline, mode: PerformanceMode):
+    """Aplica ao pipeline carregado as otimizações permanentes do modo."""
+    import torch
+
+    if mode.attention_slicing:
+        pipeline.enable_attention_slicing()
+    if mode.channels_last:
+        pipeline.unet.to(memory_format=torch.channels_last)
+        pipeline.vae.to(memory_format=torch.channels_last)
+    if mode.compile:
+        pipeline.unet = torch.compile(pipeline.unet)
+    return pipeline
+
+
+@contextmanager
+def inference_context(mode: PerformanceMode, device="cpu"):
+    """Configura threads e autocast durante uma chamada ao pipeline."""
+    import torch
+
+    previous_threads = torch.get_num_threads()
+    if mode.num_threads:
+        torch.set_num_threads(mode.num_threads)
+    autocast = (
+        torch.autocast("cpu", dtype=torch.bfloat16)
+        if mode.bfloat16 and device == "cpu" and bfloat16_supported()
+        else nullcontext()
+    )
+    try:
+        with torch.inference_mode(), autocast:
+            yield
+    finally:
+        torch.set_num_threads(previous_threads)
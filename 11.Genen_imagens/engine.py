@@ -0,0 +1,164 @@
+"""
+Motor de geração de imagens compartilhado pelas páginas genai.py e
+imagens_generator.py.
+
+Nenhum módulo pesado (torch, diffusers) é importado aqui no nível do módulo:
+eles só são carregados na primeira geração ou no aquecimento, de modo que a
+página abre tão rápido quanto uma página Streamlit comum.
+
+As páginas disparam o aquecimento em segundo plano ao abrir (start_warm_up)
+e consultam is_ready. Pela linha de comando, o aquecimento roda num processo
+à parte e só confere se o pipeline carrega (e baixa os pesos, se preciso);
+ele não aquece o servidor do Streamlit:
+    python engine.py --performance-mode padrao
+"""
+
+import argparse
+import threading
+import time
+
+from batching import GenerationRequest, batcher
+from image_cache import image_cache
+from model_registry import ModelKey, registry
+from previews import GenerationProgress
+from prompt_cache import prompt_cache
+
+MODEL_PATH = "stabilityai/stable-diffusion-2-1-base"
+SCHEDULER = "EulerDiscreteScheduler"
+
+_device = None
+_warm_up_thread = None
+
+
+def default_device() -> str:
+    """Dispositivo de inferência, detectado na primeira chamada."""
+    global _device
+    if _device is None:
+        import torch
+
+        _device = "cuda" if torch.cuda.is_available() else "cpu"
+    return _device
+
+
+def model_key(performance_mode: str = "padrao") -> ModelKey:
+    """ModelKey do pipeline usado pelas páginas."""
+    return ModelKey(
+        model_path=MODEL_PATH,
+        scheduler=SCHEDULER,
+        dtype="float32",
+        device=default_device(),
+        performance_mode=performance_mode,
+    )
+
+
+def generate_images(
+    prompt: str,
+    negative_prompt: str,
+    num_images_per_prompt: int,
+    num_inference_steps: int,
+    height: int,
+    width: int,
+    seed: int,
+    guidance_scale: float,
+    performance_mode: str = "padrao",
+    progress: GenerationProgress = None,
+    on_update=None,
+) -> list:
+    """
+    Gera imagens usando o modelo de difusão estável.
+
+    Parâmetros:
+    - prompt (str): O prompt para a geração das imagens.
+    - negative_prompt (str): O prompt negativo para a geração das imagens.
+    - num_images_per_prompt (int): O número de imagens geradas por prompt.
+    - num_inference_steps (int): O número de passos de inferência.
+    - height (int): A altura das imagens geradas.
+    - width (int): A largura das imagens geradas.
+    - seed (int): A semente para a geração de números aleatórios.
+    - guidance_scale (float): A escala de orientação da geração.
+    - performance_mode (str): O modo de desempenho da inferência em CPU.
+    - progress (GenerationProgress): Canal para prévias e cancelamento.
+    - on_update (callable): Chamada com o progresso a cada passo publicado.
+
+    Retorna:
+    - images (list): Uma lista de imagens geradas.
+    """
+    request = GenerationRequest(
+        prompt=prompt,
+        negative_prompt=negative_prompt,
+        num_images_per_prompt=num_images_per_prompt,
+        num_inference_steps=num_inference_steps,
+        height=height,
+        width=width,
+        seed=seed,
+        guidance_scale=guidance_scale,
+        model_key=model_key(performance_mode),
+    )
+
+    # Pedidos repetidos são respondidos pelo cache em disco; os demais
+    # são gerados em lote com pedidos compatíveis de outras sessões
+    images = image_cache.get(request)
+    if images is None:
+        future = batcher.submit(request, progress)
+        if progress is not None and on_update is not None:
+            images = progress.follow(future, on_update)
+        else:
+            images = future.result()
+        image_cache.put(request, images)
+    return images
+
+
+def warm_up(performance_mode: str = "padrao") -> float:
+    """
+    Importa torch/diffusers e carrega o pipeline no registro do processo.
+
+    Retorna o tempo gasto em segundos (quase zero se já estava carregado).
+    """
+    start = time.perf_counter()
+    registry.get(model_key(performance_mode))
+    return time.perf_counter() - start
+
+
+def start_warm_up(performance_mode: str = "padrao"):
+    """Dispara o aquecimento numa thread em segundo plano, uma única vez."""
+    global _warm_up_thread
+    if _warm_up_thread is None:
+        _warm_up_thread = threading.Thread(
+            target=warm_up,
+            args=(performance_mode,),
+            name="engine-warm-up",
+            daemon=True,
+        )
+        _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def is_ready(performance_mode: str = "padrao") -> bool:
+    """Indica se o pipeline já está carregado, sem disparar a carga."""
+    if _device is None:
+        return False
+    return model_key(performance_mode) in registry.stats()["models"]
+
+
+def stats() -> dict:
+    """Estatísticas de todas as camadas do motor."""
+    return {
+        "models": registry.stats(),
+        "queue": batcher.stats(),
+        "images": image_cache.stats(),
+        "embeddings": prompt_cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aquece o motor de geração de imagens"
+    )
+    parser.add_argument("--performance-mode", default="padrao")
+    args = parser.parse_args()
+    seconds = warm_up(args.performance_mode)
+    print(f"Pipeline pronto em {seconds:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Cache em disco das imagens geradas, endereçado pelo conteúdo do pedido.
+
+A chave é um hash de todos os parâmetros da geração e da identidade do
+modelo/scheduler. Como a geração é determinística para a mesma semente, um
+pedido repetido é respondido com os PNGs salvos, sem rodar o pipeline.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from PIL import Image
+
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".image_cache"
+)
+
+
+def request_digest(request) -> str:
+    """Hash estável de todos os campos do pedido, incluindo o modelo."""
+    payload = json.dumps(dataclasses.asdict(request), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """
+    Cache LRU de imagens em disco, limitado pelo tamanho total em bytes.
+
+    Cada pedido ocupa um diretório com um PNG por imagem. A data de
+    modificação do diretório marca o último uso, de modo que a ordem LRU
+    sobrevive a reinícios do servidor.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=2 * 1024**3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _scan(self):
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            self._sizes[name] = sum(
+                os.path.getsize(os.path.join(path, file))
+                for file in os.listdir(path)
+            )
+
+    def get(self, request):
+        """Devolve a lista de imagens salvas para o pedido, ou None."""
+        digest = request_digest(request)
+        with self._lock:
+            if digest not in self._sizes:
+                self.misses += 1
+                return None
+            path = self._path(digest)
+            try:
+                files = sorted(
+                    os.listdir(path), key=lambda name: int(name.split(".")[0])
+                )
+                images = []
+                for file in files:
+                    with Image.open(os.path.join(path, file)) as image:
+                        image.load()
+                        images.append(image)
+                os.utime(path)
+            except (OSError, ValueError):
+                # Entrada corrompida ou removida por fora: trata como ausente
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return images
+
+    def put(self, request, images):
+        """Salva as imagens do pedido e descarta as entradas mais antigas."""
+        digest = request_digest(request)
+        # Grava num diretório temporário e move de uma vez, para que uma
+        # leitura concorrente nunca veja uma entrada pela metade
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        size = 0
+        for idx, image in enumerate(images):
+            file = os.path.join(staging, f"{idx}.png")
+            image.save(file, format="PNG")
+            size += os.path.getsize(file)
+        with self._lock:
+            if digest in self._sizes:
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+            os.replace(staging, self._path(digest))
+            self._sizes[digest] = size
+            self._enforce_budget()
+
+    def _remove(self, digest):
+        shutil.rmtree(self._path(digest), ignore_errors=True)
+        self._sizes.pop(digest, None)
+
+    def _enforce_budget(self):
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(
+            self._sizes,
+            key=lambda digest: os.path.getmtime(self._path(digest)),
+        )
+        for digest in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes[digest]
+            self._remove(digest)
+
+    def stats(self) -> dict:
+        """Acertos, faltas e ocupação do cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._sizes),
+                "total_bytes": sum(self._sizes.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Cache padrão, compartilhado por todas as sessões do processo
+image_cache = ImageCache()
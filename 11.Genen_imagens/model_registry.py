@@ -0,0 +1,231 @@
+"""
+Registro de pipelines de difusão compartilhado por todas as sessões do
+servidor Streamlit.
+
+Cada combinação (modelo, scheduler, dtype, dispositivo) é carregada uma
+única vez por processo. Os pipelines ficam em memória até ficarem ociosos por
+tempo demais ou até que o orçamento de memória exija espaço para outro
+modelo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from cpu_performance import PERFORMANCE_MODES, apply_performance_mode
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    """Identifica um pipeline carregado."""
+
+    model_path: str
+    scheduler: str = "EulerDiscreteScheduler"
+    dtype: str = "float32"
+    device: str = "cpu"
+    performance_mode: str = "padrao"
+
+
+@dataclass
+class _Entry:
+    pipeline: object
+    size_bytes: int
+    load_seconds: float
+    last_used: float
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    in_use: int = 0
+    hits: int = 0
+    hit_seconds: float = 0.0
+
+
+def load_stable_diffusion(key: ModelKey):
+    """Carrega o scheduler e o pipeline do Stable Diffusion para a chave."""
+    import diffusers
+    import torch
+
+    scheduler_cls = getattr(diffusers, key.scheduler)
+    scheduler = scheduler_cls.from_pretrained(
+        key.model_path, subfolder="scheduler"
+    )
+    pipeline = diffusers.StableDiffusionPipeline.from_pretrained(
+        key.model_path,
+        scheduler=scheduler,
+        torch_dtype=getattr(torch, key.dtype),
+    )
+    pipeline = pipeline.to(key.device)
+    return apply_performance_mode(
+        pipeline, PERFORMANCE_MODES[key.performance_mode]
+    )
+
+
+def estimate_pipeline_bytes(pipeline) -> int:
+    """Soma o tamanho dos parâmetros de todos os componentes do pipeline."""
+    total = 0
+    for component in getattr(pipeline, "components", {}).values():
+        parameters = getattr(component, "parameters", None)
+        if callable(parameters):
+            total += sum(p.numel() * p.element_size() for p in parameters())
+    return total
+
+
+class ModelRegistry:
+    """
+    Cache de pipelines por processo, protegido por locks.
+
+    Parâmetros:
+    - loader: função que recebe uma ModelKey e devolve o pipeline carregado.
+    - memory_budget_bytes: limite de memória para os pipelines residentes
+      (None desativa o limite).
+    - idle_seconds: tempo sem uso após o qual um pipeline é descartado
+      (None desativa o descarte por ociosidade).
+    - size_fn: função que estima o tamanho em bytes de um pipeline.
+    """
+
+    def __init__(
+        self,
+        loader=load_stable_diffusion,
+        memory_budget_bytes=None,
+        idle_seconds=None,
+        size_fn=estimate_pipeline_bytes,
+        clock=time.monotonic,
+    ):
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.size_fn = size_fn
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def _acquire_entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.in_use += 1
+                return entry, False
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Apenas uma sessão carrega o modelo; as demais aguardam o resultado
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry.in_use += 1
+                    return entry, False
+
+            start = self.clock()
+            pipeline = self.loader(key)
+            load_seconds = self.clock() - start
+            entry = _Entry(
+                pipeline=pipeline,
+                size_bytes=self.size_fn(pipeline),
+                load_seconds=load_seconds,
+                last_used=self.clock(),
+                in_use=1,
+            )
+            with self._lock:
+                self._entries[key] = entry
+                self._load_locks.pop(key, None)
+                self.loads += 1
+                self._enforce_budget()
+            return entry, True
+
+    @contextmanager
+    def use(self, key: ModelKey):
+        """
+        Empresta o pipeline da chave, carregando-o se necessário.
+
+        O pipeline é usado com exclusividade dentro do bloco, pois o estado do
+        scheduler não pode ser compartilhado entre gerações simultâneas.
+        """
+        self.evict_idle()
+        start = self.clock()
+        entry, loaded = self._acquire_entry(key)
+        try:
+            with entry.lock:
+                if not loaded:
+                    with self._lock:
+                        entry.hits += 1
+                        entry.hit_seconds += self.clock() - start
+                yield entry.pipeline
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = self.clock()
+
+    def get(self, key: ModelKey):
+        """Devolve o pipeline sem reservá-lo (útil para aquecimento)."""
+        with self.use(key) as pipeline:
+            return pipeline
+
+    def _total_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def _evict(self, key):
+        del self._entries[key]
+        self.evictions += 1
+
+    def _enforce_budget(self):
+        if self.memory_budget_bytes is None:
+            return
+        # Descarta do menos para o mais recentemente usado, ignorando os
+        # pipelines que estão gerando imagens neste momento
+        for key in list(self._entries):
+            if self._total_bytes() <= self.memory_budget_bytes:
+                break
+            if self._entries[key].in_use == 0:
+                self._evict(key)
+
+    def evict_idle(self):
+        """Descarta os pipelines ociosos há mais de idle_seconds."""
+        if self.idle_seconds is None:
+            return
+        now = self.clock()
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                idle = now - entry.last_used
+                if entry.in_use == 0 and idle > self.idle_seconds:
+                    self._evict(key)
+
+    def clear(self):
+        """Remove todos os pipelines que não estão em uso."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.in_use == 0:
+                    self._evict(key)
+
+    def stats(self) -> dict:
+        """Resumo de memória e latências de carga e de acertos por modelo."""
+        with self._lock:
+            models = {}
+            for key, entry in self._entries.items():
+                models[key] = {
+                    "size_bytes": entry.size_bytes,
+                    "load_seconds": entry.load_seconds,
+                    "hits": entry.hits,
+                    "mean_hit_seconds": (
+                        entry.hit_seconds / entry.hits if entry.hits else 0.0
+                    ),
+                    "in_use": entry.in_use,
+                }
+            return {
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "total_bytes": self._total_bytes(),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "models": models,
+            }
+
+
+# Registro padrão, compartilhado por todas as sessões do processo
+registry = ModelRegistry(
+    memory_budget_bytes=8 * 1024**3,
+    idle_seconds=30 * 60,
+)
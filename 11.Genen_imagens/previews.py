@@ -0,0 +1,122 @@
+"""
+Prévias progressivas e cancelamento de gerações em andamento.
+
+O worker publica, a cada N passos, uma prévia de baixa resolução tirada
+diretamente dos latentes (sem passar pelo decodificador VAE). A sessão que
+fez o pedido acompanha as prévias e pode cancelar a geração, o que interrompe
+o pipeline no próximo passo.
+"""
+
+import threading
+
+# Aproximação linear dos latentes do Stable Diffusion para RGB
+LATENT_RGB_FACTORS = [
+    [0.298, 0.207, 0.208],
+    [0.187, 0.286, 0.173],
+    [-0.158, 0.189, 0.264],
+    [-0.184, -0.271, -0.473],
+]
+
+
+class GenerationCancelled(Exception):
+    """A geração foi cancelada pela sessão que a pediu."""
+
+
+def latents_to_preview(latents) -> list:
+    """Converte latentes (N, 4, h, w) em N imagens PIL de tamanho h x w."""
+    import torch
+    from PIL import Image
+
+    factors = torch.tensor(
+        LATENT_RGB_FACTORS, dtype=torch.float32, device=latents.device
+    )
+    rgb = torch.einsum("nchw,cr->nhwr", latents.float(), factors)
+    rgb = ((rgb + 1) / 2).clamp(0, 1).mul(255).byte().cpu().numpy()
+    return [Image.fromarray(array) for array in rgb]
+
+
+class GenerationProgress:
+    """
+    Canal entre a sessão e o worker de um pedido de geração.
+
+    Parâmetros:
+    - preview_every: intervalo, em passos, entre duas prévias.
+    """
+
+    def __init__(self, preview_every=5):
+        self.preview_every = preview_every
+        self.step = 0
+        self.total_steps = 0
+        self.previews = []
+        self._version = 0
+        self._cancelled = threading.Event()
+        self._cond = threading.Condition()
+
+    def cancel(self):
+        """Pede a interrupção da geração."""
+        self._cancelled.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def wants_preview(self, step) -> bool:
+        return self.preview_every > 0 and (step + 1) % self.preview_every == 0
+
+    def publish(self, step, total_steps, previews=None):
+        """Chamado pelo worker ao fim de cada passo."""
+        with self._cond:
+            self.step = step + 1
+            self.total_steps = total_steps
+            if previews is not None:
+                self.previews = previews
+            self._version += 1
+            self._cond.notify_all()
+
+    def follow(self, future, on_update, interval=0.5):
+        """
+        Aguarda o resultado do pedido chamando on_update a cada novidade.
+
+        Deve ser chamado pela thread da sessão, pois on_update normalmente
+        atualiza elementos da página.
+        """
+        seen = 0
+        while not future.done():
+            with self._cond:
+                if self._version == seen:
+                    self._cond.wait(interval)
+                version = self._version
+            if version != seen:
+                seen = version
+                on_update(self)
+        return future.result()
+
+
+def make_step_callback(progresses, image_counts, total_steps):
+    """
+    Cria o callback de fim de passo do pipeline para um lote de pedidos.
+
+    Interrompe a geração quando todos os pedidos do lote foram cancelados e
+    distribui as prévias para os pedidos que as solicitaram neste passo.
+    """
+
+    def on_step_end(pipeline, step, timestep, callback_kwargs):
+        if all(progress.cancelled for progress in progresses):
+            raise GenerationCancelled()
+        due = [progress.wants_preview(step) for progress in progresses]
+        previews = (
+            latents_to_preview(callback_kwargs["latents"]) if any(due) else []
+        )
+        offset = 0
+        for progress, count, wants in zip(progresses, image_counts, due):
+            progress.publish(
+                step,
+                total_steps,
+                previews[offset : offset + count] if wants else None,
+            )
+            offset += count
+        return callback_kwargs
+
+    return on_step_end
@@ -0,0 +1,87 @@
+"""
+Cache LRU dos embeddings de texto dos prompts.
+
+Ao variar apenas a semente ou o número de passos, o mesmo prompt e o mesmo
+prompt negativo seriam codificados de novo pelo CLIP a cada pedido. Os
+embeddings ficam guardados por (modelo, texto) e são passados ao pipeline
+como prompt_embeds/negative_prompt_embeds.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class PromptEmbeddingCache:
+    """
+    Cache LRU de embeddings, indexado pela ModelKey e pelo texto.
+
+    Parâmetros:
+    - max_entries: quantidade máxima de textos guardados.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, pipeline, key, texts):
+        """
+        Devolve os embeddings (len(texts), tokens, dim) dos textos.
+
+        Apenas os textos ausentes do cache passam pelo codificador de texto,
+        numa única chamada.
+        """
+        import torch
+
+        with self._lock:
+            found = {}
+            for text in texts:
+                entry = self._entries.get((key, text))
+                if entry is not None:
+                    self._entries.move_to_end((key, text))
+                    found[text] = entry
+            missing = list(dict.fromkeys(t for t in texts if t not in found))
+            self.hits += len(texts) - sum(t not in found for t in texts)
+            self.misses += len(missing)
+
+        if missing:
+            # Textos negativos são codificados como prompts comuns: o
+            # tokenizador e o codificador são os mesmos nos dois casos
+            embeddings = pipeline.encode_prompt(
+                missing,
+                device=key.device,
+                num_images_per_prompt=1,
+                do_classifier_free_guidance=False,
+            )[0]
+            with self._lock:
+                for text, embedding in zip(missing, embeddings):
+                    embedding = embedding.unsqueeze(0)
+                    found[text] = embedding
+                    self._entries[(key, text)] = embedding
+                    self._entries.move_to_end((key, text))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return torch.cat([found[text] for text in texts])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Acertos, faltas e ocupação do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# Cache padrão, compartilhado por todas as sessões do processo
+prompt_cache = PromptEmbeddingCache()
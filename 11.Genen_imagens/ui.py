@@ -0,0 +1,170 @@
+"""
+Página de geração de imagens compartilhada por genai.py e
+imagens_generator.py.
+
+Cada página só configura o título e chama show_page, que monta a barra
+lateral, acompanha a geração (prévias, progresso e cancelamento) e mostra
+as estatísticas do motor.
+"""
+
+import streamlit as st
+
+import engine
+from cpu_performance import PERFORMANCE_MODES
+from previews import GenerationCancelled, GenerationProgress
+
+
+def _sidebar():
+    # Configurações de interface do usuário na barra lateral do Streamlit
+    with st.sidebar:
+        st.header("Configurações da Geração da Imagem")
+        settings = {
+            "prompt": st.text_area("Prompt", ""),
+            "negative_prompt": st.text_area("Negative Prompt", ""),
+            "num_images_per_prompt": st.slider(
+                "Número de Imagens", min_value=1, max_value=5, value=1
+            ),
+            "num_inference_steps": st.number_input(
+                "Número de Passos de Inferência",
+                min_value=1,
+                max_value=100,
+                value=50,
+            ),
+            "height": st.selectbox(
+                "Altura da Imagem", [256, 512, 768, 1024], index=1
+            ),
+            "width": st.selectbox(
+                "Largura da Imagem", [256, 512, 768, 1024], index=1
+            ),
+            "seed": st.number_input(
+                "Seed", min_value=0, max_value=99999, value=42
+            ),
+            "guidance_scale": st.number_input(
+                "Escala de Orientação",
+                min_value=1.0,
+                max_value=20.0,
+                value=7.5,
+            ),
+            "performance_mode": st.selectbox(
+                "Modo de Desempenho (CPU)", list(PERFORMANCE_MODES), index=0
+            ),
+        }
+        preview_every = st.number_input(
+            "Prévia a cada N Passos", min_value=1, max_value=100, value=5
+        )
+        generate_button = st.button("Gerar Imagem")
+        cancel_button = st.button("Cancelar Geração")
+    return settings, preview_every, generate_button, cancel_button
+
+
+def _generate(settings, preview_every):
+    progress = GenerationProgress(preview_every=preview_every)
+    st.session_state["progress"] = progress
+    progress_bar = st.progress(0.0, text="Gerando Imagens...")
+    preview = st.empty()
+
+    def show_progress(progress):
+        progress_bar.progress(
+            progress.step / progress.total_steps,
+            text=f"Passo {progress.step} de {progress.total_steps}",
+        )
+        if progress.previews:
+            preview.image(progress.previews, width=256)
+
+    try:
+        images = engine.generate_images(
+            **settings, progress=progress, on_update=show_progress
+        )
+    except GenerationCancelled:
+        images = []
+        st.info("Geração cancelada")
+    finally:
+        # Se a página for recarregada no meio da geração, o pedido é
+        # cancelado em vez de continuar ocupando o worker
+        progress.cancel()
+        st.session_state.pop("progress", None)
+    progress_bar.empty()
+    preview.empty()
+    if images:
+        cols = st.columns(len(images))
+        for idx, (col, img) in enumerate(zip(cols, images)):
+            with col:
+                st.image(
+                    img,
+                    caption=f"Imagem {idx + 1}",
+                    use_column_width=True,
+                    output_format="auto",
+                )
+
+
+def _show_stats():
+    stats = engine.stats()
+
+    # Estatísticas dos modelos mantidos em memória pelo processo
+    with st.sidebar.expander("Modelos em Memória"):
+        models = stats["models"]
+        st.write(f"Carregamentos: {models['loads']}")
+        st.write(f"Descartes: {models['evictions']}")
+        st.write(f"Memória: {models['total_bytes'] / 1024**2:.0f} MB")
+        for key, model in models["models"].items():
+            st.write(
+                f"{key.model_path} ({key.device}): carga em "
+                f"{model['load_seconds']:.1f} s, {model['hits']} reusos, "
+                f"{model['mean_hit_seconds'] * 1000:.1f} ms por reuso"
+            )
+
+    # Estatísticas da fila de geração compartilhada entre as sessões
+    with st.sidebar.expander("Fila de Geração"):
+        queue = stats["queue"]
+        st.write(f"Pedidos na fila: {queue['queue_depth']}")
+        st.write(f"Lotes gerados: {queue['batches']}")
+        st.write(f"Ocupação média dos lotes: {queue['mean_batch_fill']:.0%}")
+        st.write(f"Espera média: {queue['mean_wait_seconds'] * 1000:.0f} ms")
+        st.write(f"Imagens por lote: {queue['batch_sizes']}")
+
+    # Estatísticas do cache de imagens em disco
+    with st.sidebar.expander("Cache de Imagens"):
+        images = stats["images"]
+        st.write(f"Acertos: {images['hits']}")
+        st.write(f"Faltas: {images['misses']}")
+        st.write(f"Entradas: {images['entries']}")
+        st.write(
+            f"Ocupação: {images['total_bytes'] / 1024**2:.1f} MB de "
+            f"{images['max_bytes'] / 1024**2:.0f} MB"
+        )
+
+    # Estatísticas do cache de embeddings dos prompts
+    with st.sidebar.expander("Cache de Embeddings"):
+        embeddings = stats["embeddings"]
+        st.write(f"Acertos: {embeddings['hits']}")
+        st.write(f"Faltas: {embeddings['misses']}")
+        st.write(f"Taxa de acerto: {embeddings['hit_rate']:.0%}")
+        st.write(
+            f"Entradas: {embeddings['entries']} de "
+            f"{embeddings['max_entries']}"
+        )
+
+
+def show_page():
+    """Barra lateral, geração com prévias e estatísticas do motor."""
+    settings, preview_every, generate_button, cancel_button = _sidebar()
+
+    # O pipeline começa a carregar em segundo plano quando a página abre,
+    # de modo que a primeira geração não espera a carga do modelo
+    engine.start_warm_up(settings["performance_mode"])
+    if not engine.is_ready(settings["performance_mode"]):
+        st.sidebar.caption("Carregando o modelo em segundo plano...")
+
+    # Uma nova geração ou o botão de cancelar interrompem a geração
+    # anterior desta sessão, liberando o worker para outros pedidos
+    if generate_button or cancel_button:
+        running = st.session_state.pop("progress", None)
+        if running is not None:
+            running.cancel()
+            if cancel_button:
+                st.info("Geração cancelada")
+
+    if generate_button and settings["prompt"]:
+        _generate(settings, preview_every)
+
+    _show_stats()
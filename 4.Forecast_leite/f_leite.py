@@ -10,6 +10,8 @@ from st_aggrid import AgGrid, GridOptionsBuilder
 from statsmodels.tsa.seasonal import seasonal_decompose
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from order_search import candidate_orders, search_orders
+
 # Configura a página do Streamlit
 st.set_page_config(
     page_title="Sistema de Análise e Previsão de Séries Temporais",
@@ -19,6 +21,65 @@ st.set_page_config(
 # Título da aplicação
 st.title("Sistema de Análise e Previsão de Séries Temporais")
 
+# Ordens do modelo SARIMAX
+ORDEM = (2, 0, 0)
+ORDEM_SAZONAL = (0, 1, 1, 12)
+
+
+def criar_serie(valores, inicio):
+    """Série temporal mensal a partir dos valores e da data inicial."""
+    return pd.Series(
+        valores,
+        index=pd.date_range(start=inicio, periods=len(valores), freq="M"),
+    )
+
+
+# A decomposição e o ajuste dependem só da série, da data inicial e das
+# ordens; mudar o horizonte de previsão reaproveita o modelo ajustado
+@st.cache_data(max_entries=16, show_spinner=False)
+def decompor(valores, inicio):
+    """Decomposição sazonal aditiva da série, pronta para o Plotly."""
+    ts_data = criar_serie(valores, inicio)
+    decomposicao = seasonal_decompose(ts_data, model="additive")
+    return pd.DataFrame(
+        {
+            "Date": ts_data.index,
+            "Observed": decomposicao.observed,
+            "Trend": decomposicao.trend,
+            "Seasonal": decomposicao.seasonal,
+            "Residual": decomposicao.resid,
+        }
+    ).reset_index(drop=True)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def ajustar_sarimax(valores, inicio, ordem, ordem_sazonal):
+    """Modelo SARIMAX ajustado, compartilhado entre as sessões."""
+    modelo = SARIMAX(
+        criar_serie(valores, inicio),
+        order=ordem,
+        seasonal_order=ordem_sazonal,
+    )
+    return modelo.fit()
+
+
+@st.cache_data(max_entries=16, show_spinner="Buscando as ordens do modelo...")
+def buscar_ordens(valores, inicio, criterio, max_termos, tempo_modelo, total):
+    """
+    Candidatos avaliados em paralelo, ordenados pelo critério; a
+    diferenciação é a das ordens padrão, e só os demais termos variam.
+    """
+    return search_orders(
+        criar_serie(valores, inicio),
+        candidate_orders(
+            d=ORDEM[1], D=ORDEM_SAZONAL[1], max_terms=max_termos
+        ),
+        criterion=criterio,
+        time_limit=tempo_modelo,
+        total_limit=total,
+    )
+
+
 # Sidebar para upload de arquivo e configuração dos parâmetros
 with st.sidebar:
     # Upload do arquivo CSV
@@ -41,6 +102,25 @@ with st.sidebar:
             value=12,
         )
 
+        # Busca automática das ordens do SARIMAX
+        busca_automatica = st.checkbox("Buscar Ordens do Modelo")
+        if busca_automatica:
+            criterio = st.radio("Critério", ["AIC", "BIC"], horizontal=True)
+            max_termos = st.number_input(
+                "Máximo de Termos (p + q + P + Q)",
+                min_value=1,
+                max_value=6,
+                value=3,
+                help=f"A diferenciação fica fixa em d = {ORDEM[1]} e "
+                f"D = {ORDEM_SAZONAL[1]}",
+            )
+            tempo_modelo = st.number_input(
+                "Tempo Máximo por Modelo (segundos)", min_value=1, value=5
+            )
+            tempo_total = st.number_input(
+                "Tempo Máximo da Busca (segundos)", min_value=1, value=60
+            )
+
         # Botão para processar os dados
         processar = st.button("Processar")
 
@@ -48,24 +128,11 @@ with st.sidebar:
 if uploaded_file is not None and processar:
     try:
         # Criação da série temporal
-        ts_data = pd.Series(
-            data.iloc[:, 0].values,
-            index=pd.date_range(start=periodo, periods=len(data), freq="M"),
-        )
+        valores = data.iloc[:, 0].to_numpy()
+        ts_data = criar_serie(valores, periodo)
 
-        # Decomposição sazonal da série temporal
-        decomposicao = seasonal_decompose(ts_data, model="additive")
-
-        # Prepara os dados de decomposição para Plotly
-        decomposicao_df = pd.DataFrame(
-            {
-                "Date": ts_data.index,
-                "Observed": decomposicao.observed,
-                "Trend": decomposicao.trend,
-                "Seasonal": decomposicao.seasonal,
-                "Residual": decomposicao.resid,
-            }
-        ).reset_index(drop=True)
+        # Decomposição sazonal da série temporal, pronta para o Plotly
+        decomposicao_df = decompor(valores, periodo)
 
         # Gráficos de decomposição com Plotly
         fig_decomposicao = make_subplots(
@@ -143,11 +210,28 @@ if uploaded_file is not None and processar:
             width=800,
         )
 
-        # Criação e ajuste do modelo SARIMAX
-        modelo = SARIMAX(
-            ts_data, order=(2, 0, 0), seasonal_order=(0, 1, 1, 12)
-        )
-        modelo_fit = modelo.fit()
+        # Ordens do modelo: fixas ou as melhores da busca
+        ordem, ordem_sazonal, busca = ORDEM, ORDEM_SAZONAL, None
+        if busca_automatica:
+            busca = buscar_ordens(
+                valores,
+                periodo,
+                criterio.lower(),
+                max_termos,
+                tempo_modelo,
+                tempo_total,
+            )
+            if busca.best is not None:
+                ordem = busca.best.order
+                ordem_sazonal = busca.best.seasonal_order
+            else:
+                st.warning(
+                    "Nenhum candidato válido na busca; usando as ordens "
+                    f"padrão {ORDEM}x{ORDEM_SAZONAL}"
+                )
+
+        # Criação e ajuste do modelo SARIMAX (do cache, se já ajustado)
+        modelo_fit = ajustar_sarimax(valores, periodo, ordem, ordem_sazonal)
 
         # Previsão
         previsao = modelo_fit.forecast(steps=periodo_previsao)
@@ -238,5 +322,24 @@ if uploaded_file is not None and processar:
                 enable_enterprise_modules=True,
             )
 
+        # Resultado e custo da busca de ordens
+        if busca is not None:
+            st.markdown("## Busca de Ordens")
+            if busca.best is not None:
+                st.write(
+                    f"Melhor modelo: {busca.best.label} ({criterio} = "
+                    f"{getattr(busca.best, busca.criterion):.2f})"
+                )
+            situacoes = ", ".join(
+                f"{quantidade} {situacao}"
+                for situacao, quantidade in busca.counts().items()
+            )
+            st.caption(
+                f"{len(busca.candidates)} candidatos em {busca.seconds:.1f} s "
+                f"com {busca.workers} processos ({situacoes}); soma dos "
+                f"ajustes: {busca.fit_seconds:.1f} s"
+            )
+            st.dataframe(busca.table(), hide_index=True)
+
     except Exception as e:
         st.error(f"Erro ao processar os dados: {e}")
@@ -0,0 +1,197 @@
+"""
+Busca automática das ordens do SARIMAX.
+
+A diferenciação (d e D) é fixada antes da busca, e só os termos p, q, P e Q
+variam: o AIC e o BIC de modelos com diferenciações diferentes não são
+comparáveis, porque a verossimilhança de cada um é calculada sobre uma série
+diferenciada diferente. Os candidatos vêm de uma grade limitada, do mais
+simples para o mais complexo, e cada um é ajustado no seu processo, até
+max_workers ao mesmo tempo. Um candidato é descartado quando o ajuste não
+converge, dá erro ou passa do tempo limite (o processo é encerrado). Os que
+restam são ordenados por AIC ou BIC. Com um tempo total, os candidatos que
+ainda não começaram quando ele acaba ficam sem avaliação, e a busca fica
+com os mais simples.
+"""
+
+import os
+import time
+import warnings
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+from process_jobs import ERROR, OK, run_jobs
+
+NOT_CONVERGED = "não convergiu"
+SKIPPED = "não avaliado"
+
+
+@dataclass
+class Candidate:
+    """Um par de ordens e o resultado do seu ajuste."""
+
+    order: tuple
+    seasonal_order: tuple
+    status: str = SKIPPED
+    aic: float = np.nan
+    bic: float = np.nan
+    seconds: float = 0.0
+    message: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"SARIMAX{self.order}x{self.seasonal_order}"
+
+
+@dataclass
+class SearchResult:
+    """Candidatos ordenados pelo critério e o custo da busca."""
+
+    candidates: list
+    criterion: str
+    workers: int
+    seconds: float
+
+    @property
+    def ranked(self) -> list:
+        valid = [c for c in self.candidates if c.status == OK]
+        return sorted(valid, key=lambda c: getattr(c, self.criterion))
+
+    @property
+    def best(self) -> Candidate:
+        ranked = self.ranked
+        return ranked[0] if ranked else None
+
+    @property
+    def fit_seconds(self) -> float:
+        """Soma dos tempos de ajuste, como se fossem um após o outro."""
+        return sum(c.seconds for c in self.candidates)
+
+    def counts(self) -> dict:
+        """Quantidade de candidatos em cada situação."""
+        counts = {}
+        for candidate in self.candidates:
+            counts[candidate.status] = counts.get(candidate.status, 0) + 1
+        return counts
+
+    def table(self) -> pd.DataFrame:
+        """Todos os candidatos, os válidos primeiro, na ordem do critério."""
+        ranked = self.ranked
+        others = [c for c in self.candidates if c.status != OK]
+        return pd.DataFrame(
+            {
+                "Modelo": [c.label for c in ranked + others],
+                "AIC": [c.aic for c in ranked + others],
+                "BIC": [c.bic for c in ranked + others],
+                "Situação": [c.status for c in ranked + others],
+                "Segundos": [c.seconds for c in ranked + others],
+                "Detalhe": [c.message for c in ranked + others],
+            }
+        )
+
+
+def candidate_orders(
+    d=0,
+    D=1,
+    max_p=2,
+    max_q=2,
+    max_P=1,
+    max_Q=1,
+    m=12,
+    max_terms=4,
+):
+    """
+    Grade de (order, seasonal_order) com a diferenciação d e D fixa e
+    p + q + P + Q <= max_terms, dos modelos com menos termos para os com
+    mais.
+    """
+    grid = [
+        ((p, d, q), (P, D, Q, m))
+        for p, q, P, Q in product(
+            range(max_p + 1),
+            range(max_q + 1),
+            range(max_P + 1),
+            range(max_Q + 1),
+        )
+        if p + q + P + Q <= max_terms
+    ]
+    return sorted(
+        grid,
+        key=lambda pair: (
+            pair[0][0] + pair[0][2] + pair[1][0] + pair[1][2],
+            pair,
+        ),
+    )
+
+
+def _fit(series, order, seasonal_order, maxiter):
+    candidate = Candidate(order, seasonal_order)
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fitted = SARIMAX(
+                series, order=order, seasonal_order=seasonal_order
+            ).fit(disp=False, maxiter=maxiter)
+        candidate.aic, candidate.bic = float(fitted.aic), float(fitted.bic)
+        converged = fitted.mle_retvals.get("converged", True)
+        candidate.status = OK if converged else NOT_CONVERGED
+    except Exception as error:
+        candidate.status = ERROR
+        candidate.message = f"{type(error).__name__}: {error}"
+    candidate.seconds = time.perf_counter() - start
+    return candidate
+
+
+def search_orders(
+    series,
+    candidates,
+    criterion="aic",
+    time_limit=10.0,
+    total_limit=None,
+    max_workers=None,
+    maxiter=50,
+) -> SearchResult:
+    """
+    Ajusta os candidatos em paralelo e os ordena por criterion ("aic" ou
+    "bic"). Todos os candidatos precisam ter os mesmos d e D.
+
+    Parâmetros:
+    - time_limit: tempo máximo do ajuste de cada candidato, em segundos.
+    - total_limit: tempo total da busca; candidatos não iniciados até lá
+      ficam sem avaliação (None para avaliar todos).
+    - maxiter: iterações do otimizador; quem não converge nelas é
+      descartado.
+    """
+    differencing = {(order[1], seasonal[1]) for order, seasonal in candidates}
+    if len(differencing) > 1:
+        raise ValueError(
+            "Os candidatos precisam ter a mesma diferenciação (d, D): o AIC "
+            "e o BIC não são comparáveis entre diferenciações diferentes"
+        )
+    start = time.perf_counter()
+    results = [Candidate(order, seasonal) for order, seasonal in candidates]
+    workers = max_workers or min(len(results), os.cpu_count() or 1) or 1
+    jobs = [
+        (idx, (series, candidate.order, candidate.seasonal_order, maxiter))
+        for idx, candidate in enumerate(results)
+    ]
+    for idx, status, value, seconds in run_jobs(
+        _fit, jobs, time_limit, workers, total_limit
+    ):
+        if status == OK:
+            results[idx] = value
+        else:
+            results[idx].status = status
+            results[idx].message = value if status == ERROR else ""
+            results[idx].seconds = seconds
+
+    return SearchResult(
+        candidates=results,
+        criterion=criterion,
+        workers=workers,
+        seconds=time.perf_counter() - start,
+    )
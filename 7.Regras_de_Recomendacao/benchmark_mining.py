@@ -0,0 +1,191 @@
+"""
+Benchmark da mineração de conjuntos frequentes.
+
+Compara o caminho original (TransactionEncoder + apriori do mlxtend) com a
+leitura esparsa em fluxo + FP-Growth em cestas sintéticas, medindo tempo e
+pico de memória (tracemalloc) de cada um. As cestas são geradas durante a
+leitura, e o custo de gerá-las entra igualmente nos dois caminhos.
+
+Com --workers, mede também a mineração particionada (SON) num arquivo
+temporário com as mesmas cestas, e o ganho de cada quantidade de processos
+em relação a um processo.
+
+Uso:
+    python benchmark_mining.py --sizes 10000 100000 1000000 --support 0.01
+    python benchmark_mining.py --sizes 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from fpgrowth import fpgrowth
+from partitioned import mine_partitioned
+from transactions import read_transactions
+
+
+def synthetic_baskets(n_transactions, n_products, mean_size, seed=0):
+    """
+    Linhas (bytes) no formato do transacoes.csv, geradas uma a uma.
+
+    Os produtos seguem uma distribuição de Zipf, como as vendas reais, em
+    que poucos produtos aparecem na maior parte das cestas.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, n_products + 1)
+    popularity /= popularity.sum()
+    sizes = np.maximum(1, rng.poisson(mean_size, n_transactions))
+    products = rng.choice(n_products, sizes.sum(), p=popularity)
+    start = 0
+    for size in sizes:
+        basket = products[start : start + size]
+        start += size
+        yield (",".join(f"Produto {p}" for p in basket) + "\n").encode()
+
+
+def _measure(function):
+    # O tracemalloc deixa as alocações bem mais lentas, então o tempo e o
+    # pico de memória são medidos em execuções separadas
+    try:
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    except MemoryError:
+        return None, float("nan"), float("nan")
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def mine_original(lines, min_support):
+    import pandas as pd
+    from mlxtend.frequent_patterns import apriori
+    from mlxtend.preprocessing import TransactionEncoder
+
+    transactions = [line.decode("utf-8").strip().split(",") for line in lines]
+    te = TransactionEncoder()
+    te_arry = te.fit(transactions).transform(transactions)
+    df = pd.DataFrame(te_arry, columns=te.columns_)
+    return apriori(df, min_support=min_support, use_colnames=True)
+
+
+def mine_sparse(lines, min_support):
+    return fpgrowth(read_transactions(lines), min_support=min_support)
+
+
+def run_benchmark(sizes, n_products, mean_size, min_support, original):
+    results = []
+    for n_transactions in sizes:
+        methods = {"esparso + fpgrowth": mine_sparse}
+        if original:
+            methods["encoder + apriori"] = mine_original
+        for name, method in methods.items():
+            itemsets, seconds, peak = _measure(
+                lambda: method(
+                    synthetic_baskets(n_transactions, n_products, mean_size),
+                    min_support,
+                )
+            )
+            row = {
+                "transacoes": n_transactions,
+                "metodo": name,
+                "segundos": seconds,
+                "pico_mb": peak / 1024**2,
+                "conjuntos": None if itemsets is None else len(itemsets),
+            }
+            results.append(row)
+            status = (
+                "sem memória"
+                if itemsets is None
+                else f"{row['conjuntos']} conjuntos"
+            )
+            print(
+                f"{n_transactions:>8} transações | {name:<20} "
+                f"{seconds:>8.2f} s {row['pico_mb']:>9.1f} MB | {status}",
+                flush=True,
+            )
+    return results
+
+
+def run_partitioned(sizes, n_products, mean_size, min_support, workers, chunk):
+    results = []
+    for n_transactions in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transacoes.csv")
+            with open(path, "wb") as file:
+                file.writelines(
+                    synthetic_baskets(n_transactions, n_products, mean_size)
+                )
+            baseline = None
+            for n_workers in workers:
+                result = mine_partitioned(
+                    path, min_support, chunk_size=chunk, max_workers=n_workers
+                )
+                baseline = baseline or result.seconds
+                results.append(
+                    {
+                        "transacoes": n_transactions,
+                        "processos": n_workers,
+                        "segundos": result.seconds,
+                        "ganho": baseline / result.seconds,
+                    }
+                )
+                print(
+                    f"{n_transactions:>8} transações | particionado "
+                    f"{n_workers:>2} processos {result.seconds:>8.2f} s "
+                    f"(ganho {baseline / result.seconds:.2f}x, "
+                    f"{result.partitions} partições, "
+                    f"{result.candidates} candidatos)",
+                    flush=True,
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark da mineração de conjuntos frequentes"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--mean-size", type=float, default=4.0)
+    parser.add_argument("--support", type=float, default=0.01)
+    parser.add_argument(
+        "--skip-original",
+        action="store_true",
+        help="não roda TransactionEncoder + apriori (exige mlxtend)",
+    )
+    parser.add_argument("--workers", nargs="+", type=int, default=[])
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+    original = not args.skip_original
+    if original:
+        try:
+            import mlxtend  # noqa: F401
+        except ImportError:
+            print("mlxtend não instalado; medindo apenas o caminho esparso")
+            original = False
+    run_benchmark(
+        args.sizes, args.products, args.mean_size, args.support, original
+    )
+    if args.workers:
+        run_partitioned(
+            args.sizes,
+            args.products,
+            args.mean_size,
+            args.support,
+            args.workers,
+            args.chunk_size,
+        )
+
+
+if __name__ == "__main__":
+    main()
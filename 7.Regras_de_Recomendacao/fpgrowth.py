@@ -0,0 +1,180 @@
+"""
+Mineração de conjuntos frequentes por FP-Growth.
+
+As transações (em ids, ver transactions.py) são gravadas numa FP-tree, com
+os itens frequentes em ordem decrescente de frequência e transações
+idênticas agrupadas com contagem. Os conjuntos frequentes saem da mineração
+recursiva das árvores condicionais, sem a geração de candidatos do apriori,
+cujo custo explode com suporte mínimo baixo.
+
+O resultado tem as colunas support e itemsets do apriori do mlxtend e pode
+ser passado diretamente para association_rules.
+"""
+
+import math
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from transactions import TransactionData
+
+
+class FPTree:
+    """FP-tree guardada em listas paralelas (nó 0 é a raiz)."""
+
+    def __init__(self):
+        self.parent = [-1]
+        self.item = [-1]
+        self.count = [0]
+        self.children = [{}]
+        # Nós de cada item, no lugar da lista encadeada do artigo original
+        self.header = {}
+
+    def insert(self, path, count):
+        """Grava um caminho de itens (em ordem de frequência) com contagem."""
+        node = 0
+        for item in path:
+            child = self.children[node].get(item)
+            if child is None:
+                child = len(self.parent)
+                self.parent.append(node)
+                self.item.append(item)
+                self.count.append(0)
+                self.children.append({})
+                self.children[node][item] = child
+                self.header.setdefault(item, []).append(child)
+            self.count[child] += count
+            node = child
+
+    def single_path(self):
+        """Itens e contagens do caminho único da árvore, ou None."""
+        path, node = [], 0
+        while self.children[node]:
+            if len(self.children[node]) > 1:
+                return None
+            (node,) = self.children[node].values()
+            path.append((self.item[node], self.count[node]))
+        return path
+
+    def prefix_paths(self, item):
+        """Base condicional do item: caminhos até ele e suas contagens."""
+        for node in self.header[item]:
+            path = []
+            parent = self.parent[node]
+            while parent > 0:
+                path.append(self.item[parent])
+                parent = self.parent[parent]
+            if path:
+                yield path[::-1], self.count[node]
+
+
+def min_count_for(min_support, n_transactions) -> int:
+    """Menor contagem com contagem / transações >= min_support."""
+    count = max(1, math.ceil(min_support * n_transactions))
+    while count > 1 and (count - 1) / n_transactions >= min_support:
+        count -= 1
+    while count / n_transactions < min_support:
+        count += 1
+    return count
+
+
+def _mine(tree, suffix, min_count, max_len, output):
+    path = tree.single_path()
+    if path is not None:
+        # Caminho único: todos os subconjuntos são frequentes
+        for size in range(1, len(path) + 1):
+            if max_len and len(suffix) + size > max_len:
+                break
+            for combo in combinations(path, size):
+                items = tuple(item for item, _ in combo)
+                support = min(count for _, count in combo)
+                output.append((suffix + items, support))
+        return
+
+    for item, nodes in tree.header.items():
+        support = sum(tree.count[node] for node in nodes)
+        if support < min_count:
+            continue
+        itemset = suffix + (item,)
+        output.append((itemset, support))
+        if max_len and len(itemset) >= max_len:
+            continue
+        base = list(tree.prefix_paths(item))
+        counts = Counter()
+        for path, count in base:
+            for parent_item in path:
+                counts[parent_item] += count
+        frequent = {i for i, c in counts.items() if c >= min_count}
+        if not frequent:
+            continue
+        conditional = FPTree()
+        for path, count in base:
+            path = [i for i in path if i in frequent]
+            if path:
+                conditional.insert(path, count)
+        _mine(conditional, itemset, min_count, max_len, output)
+
+
+def build_tree(data: TransactionData, min_count):
+    """
+    FP-tree das transações e a ordem global dos itens frequentes.
+
+    Os itens de cada transação são trocados pela posição no ranking de
+    frequência, e transações idênticas depois do filtro são gravadas uma
+    única vez com a contagem total.
+    """
+    counts = data.item_counts()
+    frequent = np.flatnonzero(counts >= min_count)
+    frequent = frequent[np.argsort(-counts[frequent], kind="stable")]
+    rank = np.full(data.n_items, -1, dtype=np.int64)
+    rank[frequent] = np.arange(len(frequent))
+
+    ranked = rank[data.indices]
+    keep = ranked >= 0
+    rows = np.repeat(np.arange(len(data)), np.diff(data.indptr))[keep]
+    lengths = np.bincount(rows, minlength=len(data))
+    ranked = ranked[keep]
+    # Ordena os itens de cada transação pelo ranking de frequência
+    ranked = ranked[np.lexsort((ranked, rows))]
+    bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+    ranked = ranked.tolist()
+    paths = Counter(
+        tuple(ranked[bounds[t] : bounds[t + 1]])
+        for t in range(len(data))
+        if bounds[t + 1] > bounds[t]
+    )
+    tree = FPTree()
+    for path, count in paths.items():
+        tree.insert(path, count)
+    return tree, frequent
+
+
+def fpgrowth(data: TransactionData, min_support=0.5, max_len=None):
+    """
+    Conjuntos frequentes com suporte >= min_support.
+
+    Retorna um DataFrame com as colunas support e itemsets (frozenset com os
+    nomes dos itens), como o apriori do mlxtend com use_colnames=True.
+    """
+    n = len(data)
+    if n == 0:
+        return pd.DataFrame({"support": [], "itemsets": []})
+    min_count = min_count_for(min_support, n)
+    tree, frequent = build_tree(data, min_count)
+    output = []
+    _mine(tree, (), min_count, max_len, output)
+
+    # Conjuntos do mesmo tamanho juntos, como no apriori
+    output.sort(key=lambda entry: (len(entry[0]), -entry[1]))
+    names = [data.items[item] for item in frequent]
+    return pd.DataFrame(
+        {
+            "support": [count / n for _, count in output],
+            "itemsets": [
+                frozenset(names[item] for item in itemset)
+                for itemset, _ in output
+            ],
+        }
+    )
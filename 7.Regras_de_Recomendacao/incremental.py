@@ -0,0 +1,457 @@
+"""
+Manutenção incremental dos conjuntos frequentes de um log de transações.
+
+O log cresce só no final (transações novas acrescentadas ao mesmo arquivo).
+O estado em disco é dividido em duas partes:
+
+- do log, uma por arquivo: a posição já lida, o seu hash, o vocabulário, a
+  contagem de todos os itens e o histórico já codificado (CSR em arquivos
+  binários que só crescem no final), para não precisar ler e decodificar o
+  log de novo;
+- de cada suporte mínimo, pequena: a contagem dos conjuntos frequentes junto
+  com a sua fronteira negativa (os conjuntos não frequentes cujos
+  subconjuntos próprios são todos frequentes) e até qual transação do
+  histórico ela vale.
+
+A cada atualização, só as linhas depois da última posição lida são
+processadas e acrescentadas ao histórico; as contagens do suporte pedido são
+somadas com as transações do histórico que ele ainda não viu. Se nenhum
+conjunto da fronteira passou a ser frequente, os novos conjuntos frequentes
+estão todos entre os contados; caso contrário, apenas os novos candidatos
+são contados no histórico. O resultado é idêntico ao de minerar o log
+inteiro de novo. Sem transações novas, nada é gravado.
+
+Os conjuntos são acompanhados com um suporte um pouco abaixo do pedido
+(margin), para que itens perto do limite não forcem recontagens a cada lote.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from fpgrowth import fpgrowth, min_count_for
+from transactions import TransactionData, read_transactions
+
+STATE_DIR = os.path.join(os.path.dirname(__file__), ".regras_estado")
+
+# Uma atualização por vez em cada log
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+@dataclass
+class LogState:
+    """Parte do log lida até agora, comum a todos os suportes."""
+
+    log_id: str
+    n_transactions: int
+    n_indices: int
+    offset: int
+    digest: str
+    vocabulary: list
+    item_counts: Counter
+
+    @property
+    def ids(self) -> dict:
+        return {item: idx for idx, item in enumerate(self.vocabulary)}
+
+
+@dataclass
+class IncrementalState:
+    """
+    Contagens de um suporte, válidas para as n_transactions primeiras
+    transações do histórico do log log_id.
+    """
+
+    track_support: float
+    log_id: str
+    n_transactions: int
+    counts: dict
+
+
+@dataclass
+class UpdateResult:
+    """Conjuntos frequentes depois de uma atualização."""
+
+    itemsets: pd.DataFrame
+    n_transactions: int
+    n_items: int
+    new_transactions: int
+    recounted: int
+    origin: str
+    seconds: float
+
+
+def apriori_gen(level):
+    """
+    Candidatos de tamanho k + 1 a partir dos conjuntos frequentes de tamanho
+    k (tuplas ordenadas), com a poda dos que têm subconjunto não frequente.
+    """
+    level = sorted(level)
+    frequent = set(level)
+    candidates = []
+    for i, first in enumerate(level):
+        for second in level[i + 1 :]:
+            if first[:-1] != second[:-1]:
+                break
+            candidate = first + second[-1:]
+            if all(
+                subset in frequent
+                for subset in combinations(candidate, len(candidate) - 1)
+            ):
+                candidates.append(candidate)
+    return candidates
+
+
+def negative_border(frequent_items, frequent):
+    """
+    Conjuntos de tamanho >= 2 da fronteira negativa.
+
+    frequent_items são os itens frequentes e frequent os conjuntos
+    frequentes de tamanho >= 2, como tuplas ordenadas.
+    """
+    border = set()
+    level = [(item,) for item in sorted(frequent_items)]
+    while level:
+        candidates = apriori_gen(level)
+        border.update(c for c in candidates if c not in frequent)
+        level = [c for c in candidates if c in frequent]
+    return border
+
+
+def _hash_prefix(source, size, chunk_size=1024 * 1024):
+    # Hash dos primeiros size bytes e se eles terminam em fim de linha. O
+    # trecho lido pode ter acabado no fim do arquivo sem quebra de linha
+    # (comum em CSVs exportados): ele continua valendo se o conteúdo novo
+    # começa numa linha nova ou se não há conteúdo novo
+    digest = hashlib.sha256()
+    remaining, last = size, b"\n"
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        digest.update(chunk)
+        remaining -= len(chunk)
+        last = chunk[-1:]
+    if remaining > 0:
+        return digest, False
+    if last in (b"\n", b"\r"):
+        return digest, True
+    following = source.read(1)
+    source.seek(-len(following), os.SEEK_CUR)
+    return digest, following in (b"", b"\n", b"\r")
+
+
+def _hashed(lines, digest):
+    # Atualiza o hash com as linhas à medida que elas são lidas
+    for line in lines:
+        digest.update(line)
+        yield line
+
+
+class IncrementalMiner:
+    """
+    Conjuntos frequentes de um log, atualizados a partir do estado salvo.
+
+    Parâmetros:
+    - name: nome do log (por exemplo, o nome do arquivo enviado).
+    - min_support: suporte mínimo; cada suporte tem as suas contagens, e o
+      histórico do log é compartilhado entre eles.
+    - margin: fração do suporte mínimo abaixo dele em que os conjuntos
+      continuam acompanhados.
+    """
+
+    def __init__(
+        self,
+        name,
+        min_support,
+        directory=STATE_DIR,
+        margin=0.2,
+    ):
+        self.name = name
+        self.min_support = min_support
+        self.track_support = min_support * (1 - margin)
+        self.directory = directory
+
+    @property
+    def base(self) -> str:
+        safe = "".join(c if c.isalnum() else "_" for c in str(self.name))
+        return os.path.join(self.directory, safe)
+
+    @property
+    def log_path(self) -> str:
+        return self.base + ".log.pkl"
+
+    @property
+    def path(self) -> str:
+        return self.base + f".suporte_{self.min_support:.6g}.pkl"
+
+    def _history_paths(self):
+        return self.base + ".indptr", self.base + ".indices"
+
+    def _write_history(self, log, indptr, indices, append):
+        # indptr sem o zero inicial; os arquivos são cortados no tamanho
+        # registrado no estado antes de crescer, descartando sobras de uma
+        # gravação interrompida
+        os.makedirs(self.directory, exist_ok=True)
+        indptr_path, indices_path = self._history_paths()
+        mode = "r+b" if append else "wb"
+        for path, array, size in (
+            (indptr_path, indptr.astype(np.int64), 8 * log.n_transactions),
+            (indices_path, indices.astype(np.int32), 4 * log.n_indices),
+        ):
+            with open(path, mode) as file:
+                file.truncate(size if append else 0)
+                file.seek(0, os.SEEK_END)
+                file.write(array.tobytes())
+
+    def history(self, log, first=0) -> TransactionData:
+        """Transações do log a partir de first, mapeadas do disco."""
+        indptr_path, indices_path = self._history_paths()
+        indptr, indices = np.zeros(1, np.int64), np.zeros(0, np.int32)
+        if log.n_transactions:
+            indptr = np.concatenate(
+                [
+                    indptr,
+                    np.memmap(
+                        indptr_path,
+                        np.int64,
+                        "r",
+                        shape=(log.n_transactions,),
+                    ),
+                ]
+            )
+        if log.n_indices:
+            indices = np.memmap(
+                indices_path, np.int32, "r", shape=(log.n_indices,)
+            )
+        indptr = indptr[first:]
+        return TransactionData(
+            items=log.vocabulary,
+            indptr=indptr - indptr[0],
+            indices=indices[indptr[0] :],
+            digest=log.digest,
+        )
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _save(self, path, state):
+        os.makedirs(self.directory, exist_ok=True)
+        staging = path + ".tmp"
+        with open(staging, "wb") as file:
+            pickle.dump(state, file)
+        os.replace(staging, path)
+
+    def load(self):
+        return self._load(self.path)
+
+    def save(self, state: IncrementalState):
+        self._save(self.path, state)
+
+    def update(self, source) -> UpdateResult:
+        """
+        Atualiza as contagens com o conteúdo novo de source (arquivo binário
+        que aceite seek) e retorna os conjuntos frequentes do log inteiro.
+        """
+        with _locks_guard:
+            lock = _locks.setdefault(self.base, threading.Lock())
+        with lock:
+            return self._update(source)
+
+    def _update(self, source):
+        start = time.perf_counter()
+        log = self._update_log(source)
+        state = self.load()
+        if state is not None and (
+            state.track_support != self.track_support
+            or state.log_id != log.log_id
+            or state.n_transactions > log.n_transactions
+        ):
+            state = None
+        recounted = 0
+        if state is None:
+            state = self._full(log)
+            new_transactions = log.n_transactions
+            origin = "mineração completa"
+            self.save(state)
+        else:
+            new_transactions = log.n_transactions - state.n_transactions
+            origin = "sem transações novas"
+            if new_transactions:
+                recounted = self._apply(
+                    state, log, self.history(log, state.n_transactions)
+                )
+                origin = (
+                    f"atualização incremental, {new_transactions} "
+                    "transações novas"
+                )
+                if recounted:
+                    origin += " com recontagem no histórico"
+                self.save(state)
+        return UpdateResult(
+            itemsets=self.frequent_itemsets(state, log),
+            n_transactions=log.n_transactions,
+            n_items=len(log.item_counts),
+            new_transactions=new_transactions,
+            recounted=recounted,
+            origin=origin,
+            seconds=time.perf_counter() - start,
+        )
+
+    def _update_log(self, source):
+        # Lê só o que foi acrescentado ao log; grava o estado do log só
+        # quando a posição lida muda
+        log = self._load(self.log_path)
+        source.seek(0)
+        if log is not None:
+            # O log precisa começar pelo trecho já lido, inteiro
+            digest, complete = _hash_prefix(source, log.offset)
+            if not complete or digest.hexdigest() != log.digest:
+                log = None
+        if log is None:
+            source.seek(0)
+            digest = hashlib.sha256()
+            data = read_transactions(_hashed(source, digest))
+            log = LogState(
+                log_id=uuid.uuid4().hex,
+                n_transactions=0,
+                n_indices=0,
+                offset=source.tell(),
+                digest=digest.hexdigest(),
+                vocabulary=list(data.items),
+                item_counts=Counter(
+                    dict(zip(data.items, data.item_counts().tolist()))
+                ),
+            )
+            self._write_history(
+                log, data.indptr[1:], data.indices, append=False
+            )
+            log.n_transactions = len(data)
+            log.n_indices = len(data.indices)
+            self._save(self.log_path, log)
+            return log
+
+        delta = read_transactions(_hashed(source, digest))
+        if source.tell() == log.offset:
+            return log
+        ids = log.ids
+        for item in delta.items:
+            if item not in ids:
+                ids[item] = len(log.vocabulary)
+                log.vocabulary.append(item)
+        mapping = np.array([ids[item] for item in delta.items], np.int64)
+        self._write_history(
+            log,
+            delta.indptr[1:] + log.n_indices,
+            mapping[delta.indices] if len(mapping) else delta.indices,
+            append=True,
+        )
+        log.n_transactions += len(delta)
+        log.n_indices += len(delta.indices)
+        log.item_counts.update(
+            dict(zip(delta.items, delta.item_counts().tolist()))
+        )
+        log.offset = source.tell()
+        log.digest = digest.hexdigest()
+        self._save(self.log_path, log)
+        return log
+
+    def _full(self, log):
+        # Mineração do histórico inteiro com o FP-Growth
+        data = self.history(log)
+        frequent = fpgrowth(data, self.track_support)
+        min_count = min_count_for(self.track_support, max(len(data), 1))
+        counts = {
+            tuple(sorted(itemset)): round(support * len(data))
+            for itemset, support in zip(
+                frequent["itemsets"], frequent["support"]
+            )
+            if len(itemset) > 1
+        }
+        frequent_items = [
+            item
+            for item, count in log.item_counts.items()
+            if count >= min_count
+        ]
+        border = sorted(negative_border(frequent_items, set(counts)))
+        counts.update(zip(border, data.count_itemsets(border).tolist()))
+        return IncrementalState(
+            track_support=self.track_support,
+            log_id=log.log_id,
+            n_transactions=log.n_transactions,
+            counts=counts,
+        )
+
+    def _apply(self, state, log, delta):
+        # Soma as contagens das transações que o suporte ainda não viu
+        tracked = list(state.counts)
+        for itemset, count in zip(tracked, delta.count_itemsets(tracked)):
+            state.counts[itemset] += int(count)
+        state.n_transactions = log.n_transactions
+
+        # Conjuntos da fronteira que viraram frequentes geram candidatos
+        # ainda não contados, que são contados no histórico salvo
+        recounted = 0
+        min_count = min_count_for(
+            self.track_support, max(log.n_transactions, 1)
+        )
+        while True:
+            frequent_items, frequent = self._frequent(state, log, min_count)
+            border = negative_border(frequent_items, frequent)
+            missing = sorted(border - state.counts.keys())
+            if not missing:
+                break
+            counts = self.history(log).count_itemsets(missing)
+            state.counts.update(zip(missing, counts.tolist()))
+            recounted += len(missing)
+
+        # Só os frequentes e a fronteira continuam guardados
+        keep = frequent | border
+        state.counts = {k: v for k, v in state.counts.items() if k in keep}
+        return recounted
+
+    @staticmethod
+    def _frequent(state, log, min_count):
+        frequent_items = {
+            item
+            for item, count in log.item_counts.items()
+            if count >= min_count
+        }
+        frequent = {
+            itemset
+            for itemset, count in state.counts.items()
+            if count >= min_count
+        }
+        return frequent_items, frequent
+
+    def frequent_itemsets(self, state, log) -> pd.DataFrame:
+        """Conjuntos frequentes no formato do fpgrowth."""
+        n = log.n_transactions
+        if n == 0:
+            return pd.DataFrame({"support": [], "itemsets": []})
+        min_count = min_count_for(self.min_support, n)
+        frequent_items, frequent = self._frequent(state, log, min_count)
+        output = [((item,), log.item_counts[item]) for item in frequent_items]
+        output += [(itemset, state.counts[itemset]) for itemset in frequent]
+        output.sort(key=lambda entry: (len(entry[0]), -entry[1], entry[0]))
+        return pd.DataFrame(
+            {
+                "support": [count / n for _, count in output],
+                "itemsets": [frozenset(itemset) for itemset, _ in output],
+            }
+        )
@@ -0,0 +1,155 @@
+"""
+Cache dos conjuntos frequentes minerados.
+
+Confiança, lift e tamanho mínimo só filtram as regras; a mineração depende
+apenas do arquivo e do suporte mínimo. Por isso os conjuntos frequentes
+ficam guardados por hash do conteúdo do arquivo, junto com as transações já
+codificadas e o menor suporte minerado. Um pedido com suporte maior ou igual
+é atendido filtrando esse resultado, e só um suporte menor exige minerar de
+novo. No modo particionado as transações não ficam em memória; apenas os
+conjuntos frequentes são guardados.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from fpgrowth import fpgrowth
+from partitioned import mine_partitioned
+from transactions import read_transactions
+
+
+def file_digest(uploaded_file, chunk_size=1024 * 1024) -> str:
+    """Hash do conteúdo do arquivo; a posição de leitura volta ao início."""
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(chunk_size), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+@dataclass
+class _Entry:
+    transactions: object = None
+    n_transactions: int = 0
+    n_items: int = 0
+    min_support: float = None
+    itemsets: pd.DataFrame = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class MiningResult:
+    """Conjuntos frequentes de um pedido e de onde eles vieram."""
+
+    itemsets: pd.DataFrame
+    n_transactions: int
+    n_items: int
+    cached: bool
+    seconds: float
+
+    @property
+    def origin(self) -> str:
+        return "do cache" if self.cached else "minerados"
+
+
+class ItemsetCache:
+    """
+    Conjuntos frequentes por arquivo, compartilhados entre as sessões.
+
+    Parâmetros:
+    - max_files: quantidade de arquivos guardados; ao atingir o limite, o
+      usado há mais tempo é descartado.
+    - miner: função (transações, min_support) -> conjuntos frequentes.
+    """
+
+    def __init__(self, max_files=8, miner=fpgrowth):
+        self.max_files = max_files
+        self.miner = miner
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, digest):
+        with self._lock:
+            entry = self._entries.setdefault(digest, _Entry())
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _mine(self, entry, uploaded_file, min_support, partition_size):
+        if partition_size:
+            result = mine_partitioned(
+                uploaded_file, min_support, chunk_size=partition_size
+            )
+            entry.n_transactions = result.n_transactions
+            entry.n_items = result.n_items
+            return result.itemsets
+        if entry.transactions is None:
+            uploaded_file.seek(0)
+            entry.transactions = read_transactions(uploaded_file)
+            entry.n_transactions = len(entry.transactions)
+            entry.n_items = entry.transactions.n_items
+        return self.miner(entry.transactions, min_support)
+
+    def frequent_itemsets(
+        self, uploaded_file, min_support, partition_size=None
+    ) -> MiningResult:
+        """
+        Conjuntos frequentes do arquivo com suporte >= min_support.
+
+        Com partition_size, a mineração é particionada (mine_partitioned)
+        em partições com esse número de linhas.
+        """
+        start = time.perf_counter()
+        entry = self._entry(file_digest(uploaded_file))
+        # Um pedido por arquivo minera de cada vez; os demais aproveitam
+        with entry.lock:
+            cached = (
+                entry.min_support is not None
+                and entry.min_support <= min_support
+            )
+            if cached:
+                itemsets = entry.itemsets[
+                    entry.itemsets["support"] >= min_support
+                ].reset_index(drop=True)
+            else:
+                itemsets = self._mine(
+                    entry, uploaded_file, min_support, partition_size
+                )
+                entry.min_support, entry.itemsets = min_support, itemsets
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return MiningResult(
+            itemsets=itemsets,
+            n_transactions=entry.n_transactions,
+            n_items=entry.n_items,
+            cached=cached,
+            seconds=time.perf_counter() - start,
+        )
+
+    def stats(self) -> dict:
+        """Arquivos guardados, acertos e minerações realizadas."""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "supports": {
+                    digest[:12]: entry.min_support
+                    for digest, entry in self._entries.items()
+                },
+            }
+
+
+itemset_cache = ItemsetCache()
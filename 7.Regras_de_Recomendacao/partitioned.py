@@ -0,0 +1,214 @@
+"""
+Mineração particionada (SON) para arquivos maiores que a memória.
+
+Na primeira passada o arquivo é lido em partições de chunk_size linhas, e
+cada partição é minerada num processo do pool com o mesmo suporte mínimo
+relativo. Todo conjunto frequente no arquivo inteiro é frequente em pelo
+menos uma partição, então a união dos conjuntos locais contém todos os
+candidatos. Na segunda passada o arquivo é lido de novo e o suporte global
+de cada candidato é contado partição a partição. A memória fica limitada às
+partições em processamento, e não ao tamanho do arquivo.
+"""
+
+import argparse
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from fpgrowth import fpgrowth, min_count_for
+from transactions import read_transactions
+
+# Configuração da passada atual, enviada uma única vez para cada processo
+_min_support = None
+_candidates = ()
+
+
+@dataclass
+class PartitionedResult:
+    """Conjuntos frequentes e o custo de cada passada."""
+
+    itemsets: pd.DataFrame
+    n_transactions: int
+    n_items: int
+    partitions: int
+    candidates: int
+    seconds: float
+
+
+def _init_worker(min_support, candidates):
+    global _min_support, _candidates
+    _min_support, _candidates = min_support, candidates
+
+
+def _lines(source):
+    # Caminho de arquivo ou arquivo binário já aberto (como o do upload)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from file
+    else:
+        source.seek(0)
+        yield from source
+
+
+def _partitions(source, chunk_size):
+    lines = _lines(source)
+    while chunk := list(islice(lines, chunk_size)):
+        yield chunk
+
+
+def _map_bounded(pool, function, chunks, max_pending):
+    # Limita as partições lidas e ainda não processadas
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(function, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _mine_partition(lines):
+    data = read_transactions(lines)
+    itemsets = fpgrowth(data, _min_support)
+    counts = dict(zip(data.items, data.item_counts().tolist()))
+    local = {itemset for itemset in itemsets["itemsets"] if len(itemset) > 1}
+    return len(data), counts, local
+
+
+def _count_partition(lines):
+    return read_transactions(lines).count_itemsets(_candidates)
+
+
+def count_partitioned(source, itemsets, chunk_size=100_000, max_workers=None):
+    """
+    Suporte absoluto de cada conjunto de itens, contado partição a
+    partição num pool de processos.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    totals = np.zeros(len(itemsets), dtype=np.int64)
+    if not itemsets:
+        return totals
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(None, list(itemsets)),
+    ) as pool:
+        for counts in _map_bounded(
+            pool,
+            _count_partition,
+            _partitions(source, chunk_size),
+            2 * workers,
+        ):
+            totals += counts
+    return totals
+
+
+def mine_partitioned(
+    source, min_support, chunk_size=100_000, max_workers=None
+) -> PartitionedResult:
+    """
+    Conjuntos frequentes de um arquivo de transações em duas passadas.
+
+    source é um caminho ou um arquivo binário que aceite seek(0). O
+    resultado tem o mesmo formato do fpgrowth.
+    """
+    start = time.perf_counter()
+    workers = max_workers or os.cpu_count() or 1
+
+    # Primeira passada: contagem dos itens e conjuntos frequentes locais
+    n_transactions, partitions = 0, 0
+    item_counts, candidates = Counter(), set()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(min_support, ()),
+    ) as pool:
+        for n, counts, local in _map_bounded(
+            pool,
+            _mine_partition,
+            _partitions(source, chunk_size),
+            2 * workers,
+        ):
+            n_transactions += n
+            partitions += 1
+            item_counts.update(counts)
+            candidates |= local
+    if n_transactions == 0:
+        return PartitionedResult(
+            itemsets=pd.DataFrame({"support": [], "itemsets": []}),
+            n_transactions=0,
+            n_items=0,
+            partitions=partitions,
+            candidates=0,
+            seconds=time.perf_counter() - start,
+        )
+
+    # Os itens já têm contagem global; só candidatos com todos os itens
+    # frequentes no arquivo inteiro seguem para a segunda passada
+    min_count = min_count_for(min_support, n_transactions)
+    frequent_items = {
+        name for name, count in item_counts.items() if count >= min_count
+    }
+    candidates = [
+        tuple(sorted(itemset))
+        for itemset in candidates
+        if itemset <= frequent_items
+    ]
+    totals = count_partitioned(source, candidates, chunk_size, workers)
+
+    output = [((name,), item_counts[name]) for name in frequent_items]
+    output += [
+        (candidate, int(count))
+        for candidate, count in zip(candidates, totals)
+        if count >= min_count
+    ]
+    output.sort(key=lambda entry: (len(entry[0]), -entry[1], entry[0]))
+    return PartitionedResult(
+        itemsets=pd.DataFrame(
+            {
+                "support": [count / n_transactions for _, count in output],
+                "itemsets": [frozenset(itemset) for itemset, _ in output],
+            }
+        ),
+        n_transactions=n_transactions,
+        n_items=len(item_counts),
+        partitions=partitions,
+        candidates=len(candidates),
+        seconds=time.perf_counter() - start,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Conjuntos frequentes de um arquivo de transações grande"
+    )
+    parser.add_argument("path", help="arquivo no formato do transacoes.csv")
+    parser.add_argument("--support", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="conjuntos_frequentes.csv")
+    args = parser.parse_args()
+    result = mine_partitioned(
+        args.path, args.support, args.chunk_size, args.workers
+    )
+    itemsets = result.itemsets.assign(
+        itemsets=result.itemsets["itemsets"].map(
+            lambda itemset: ",".join(sorted(itemset))
+        )
+    )
+    itemsets.to_csv(args.output, index=False)
+    print(
+        f"{result.n_transactions} transações em {result.partitions} "
+        f"partições, {result.candidates} candidatos, {len(itemsets)} "
+        f"conjuntos frequentes em {result.seconds:.2f} s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
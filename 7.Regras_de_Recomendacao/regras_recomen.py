@@ -1,10 +1,20 @@
+import time
+from itertools import islice
+
 import altair as alt
 import pandas as pd
 import streamlit as st
-from mlxtend.frequent_patterns import apriori, association_rules
-from mlxtend.preprocessing import TransactionEncoder
+from mlxtend.frequent_patterns import association_rules
 from st_aggrid import AgGrid, GridOptionsBuilder
 
+from incremental import IncrementalMiner
+from itemset_cache import itemset_cache
+from rule_index import RuleIndex
+from transactions import parse_line, read_transactions
+
+# Quantidade de transações exibidas na tabela de transações
+TRANSACOES_EXIBIDAS = 1000
+
 # Configurações da página do Streamlit
 st.set_page_config(
     page_title="Geração de Regras de Recomendação", layout="wide"
@@ -20,23 +30,58 @@ with st.sidebar:
     )
     lift_minimo = st.number_input("Lift Mínimo", 0.0001, 10.0, 1.0, 0.1)
     tamanho_minimo = st.number_input("Tamanho Mínimo", 1, 10, 2, 1)
+    modo = st.radio(
+        "Modo de Mineração",
+        ["Em Memória", "Particionado", "Incremental"],
+        help="Particionado: minera partes do arquivo em paralelo sem "
+        "carregá-lo inteiro na memória. Incremental: para um log que só "
+        "cresce no final, processa apenas as transações novas desde o "
+        "último processamento.",
+    )
+    if modo == "Particionado":
+        tamanho_particao = st.number_input(
+            "Transações por Partição", 1000, 10_000_000, 100_000, 10_000
+        )
     processar = st.button("Processar")
+    st.caption(
+        "Depois de processar um arquivo, as regras são atualizadas a cada "
+        "mudança nos parâmetros"
+    )
 
-# Processamento dos dados e geração das regras de associação
+# Depois do primeiro processamento, mudanças nos parâmetros refazem as
+# regras sem novo clique; os conjuntos frequentes vêm do cache
 if processar and uploaded_file is not None:
+    st.session_state["arquivo_processado"] = (
+        uploaded_file.name,
+        uploaded_file.size,
+    )
+processado = uploaded_file is not None and st.session_state.get(
+    "arquivo_processado"
+) == (uploaded_file.name, uploaded_file.size)
+
+# Processamento dos dados e geração das regras de associação
+if processado:
     try:
-        # Leitura e processamento das transações
-        transactions = [
-            line.decode("utf-8").strip().split(",") for line in uploaded_file
-        ]
-        te = TransactionEncoder()
-        te_arry = te.fit(transactions).transform(transactions)
-        df = pd.DataFrame(te_arry, columns=te.columns_)
+        # Conjuntos frequentes do cache, ou leitura esparsa e FP-Growth
+        if modo == "Incremental":
+            mineracao = IncrementalMiner(
+                uploaded_file.name, suporte_minimo
+            ).update(uploaded_file)
+        else:
+            mineracao = itemset_cache.frequent_itemsets(
+                uploaded_file,
+                suporte_minimo,
+                partition_size=(
+                    tamanho_particao if modo == "Particionado" else None
+                ),
+            )
+        uploaded_file.seek(0)
+        df = read_transactions(
+            islice(uploaded_file, TRANSACOES_EXIBIDAS)
+        ).to_frame()
 
-        # Geração de conjuntos frequentes e regras de associação
-        frequent_itemsets = apriori(
-            df, min_support=suporte_minimo, use_colnames=True
-        )
+        # Geração das regras de associação
+        frequent_itemsets = mineracao.itemsets
         regras = association_rules(
             frequent_itemsets,
             metric="confidence",
@@ -52,6 +97,11 @@ if processar and uploaded_file is not None:
             col1, col2 = st.columns(2)
             with col1:
                 st.header("Transações")
+                st.caption(
+                    f"{mineracao.n_transactions} transações e "
+                    f"{mineracao.n_items} itens distintos "
+                    f"(exibindo até {TRANSACOES_EXIBIDAS} transações)"
+                )
                 gb = GridOptionsBuilder.from_dataframe(df)
                 gb.configure_pagination()
                 gb.configure_side_bar()
@@ -112,6 +162,10 @@ if processar and uploaded_file is not None:
                 f"Confiança Média: {regras_filtradas['confidence'].mean():.4f}"
             )
             st.write(f"Lift Médio: {regras_filtradas['lift'].mean():.4f}")
+            st.write(
+                f"Conjuntos Frequentes: {len(frequent_itemsets)} "
+                f"({mineracao.origin} em {mineracao.seconds:.2f} s)"
+            )
 
             # Botão para exportar as regras como CSV
             st.download_button(
@@ -120,6 +174,49 @@ if processar and uploaded_file is not None:
                 file_name="regras_associacao.csv",
                 mime="text/csv",
             )
+
+            # Recomendações a partir do índice das regras filtradas
+            st.header("Recomendações")
+            indice = RuleIndex.from_rules(regras_filtradas)
+            top_k = st.number_input("Itens por Cesta", 1, 20, 3, 1)
+            col1, col2 = st.columns(2)
+            with col1:
+                cesta = st.text_input("Cesta (itens separados por vírgula)")
+                if cesta:
+                    inicio = time.perf_counter()
+                    recomendacoes = indice.recommend(parse_line(cesta), top_k)
+                    tempo = time.perf_counter() - inicio
+                    if recomendacoes:
+                        st.dataframe(
+                            pd.DataFrame(
+                                recomendacoes,
+                                columns=["item", "lift", "confianca"],
+                            ),
+                            hide_index=True,
+                        )
+                    else:
+                        st.write("Nenhuma regra se aplica a esta cesta")
+                    st.caption(f"Consulta em {tempo * 1e6:.0f} µs")
+            with col2:
+                arquivo_cestas = st.file_uploader(
+                    "Cestas para Pontuar", type=["csv"], key="cestas"
+                )
+                if arquivo_cestas is not None:
+                    cestas = read_transactions(arquivo_cestas)
+                    inicio = time.perf_counter()
+                    pontuadas = indice.recommend_batch(cestas, top_k)
+                    tempo = max(time.perf_counter() - inicio, 1e-9)
+                    st.dataframe(pontuadas.head(1000), hide_index=True)
+                    st.caption(
+                        f"{len(cestas)} cestas em {tempo:.3f} s "
+                        f"({len(cestas) / tempo:,.0f} cestas/s)"
+                    )
+                    st.download_button(
+                        label="Exportar Recomendações como CSV",
+                        data=pontuadas.to_csv(index=False),
+                        file_name="recomendacoes.csv",
+                        mime="text/csv",
+                    )
         else:
             st.write(
                 "Nenhuma Regra foi encontrada com os parâmetros definidos"
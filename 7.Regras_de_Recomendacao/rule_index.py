@@ -0,0 +1,253 @@
+"""
+Índice das regras de associação para recomendação.
+
+As regras são ordenadas por lift (e confiança, no empate) e compiladas num
+índice invertido: cada regra fica na lista de um único item do seu
+antecedente, o que aparece em menos antecedentes, e cada lista segue a
+ordem das regras. Uma regra dispara numa cesta quando os demais itens do
+antecedente também estão na cesta, e os consequentes das regras disparadas
+que ainda não estão na cesta são recomendados na ordem da melhor regra que
+os recomenda.
+
+Como as listas estão ordenadas, a consulta para assim que os k melhores
+itens são conhecidos: recommend percorre as listas da cesta intercaladas
+por posto, e recommend_batch, vetorizado em blocos de cestas, corta cada
+lista no ponto em que as regras de antecedente unitário dela já garantem
+k itens novos.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from transactions import TransactionData
+
+COLUMNS = ["cesta", "posicao", "item", "lift", "confianca"]
+
+
+def _csr(groups):
+    indptr = np.zeros(len(groups) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(group) for group in groups])
+    indices = np.fromiter(
+        (item for group in groups for item in group),
+        dtype=np.int64,
+        count=indptr[-1],
+    )
+    return indptr, indices
+
+
+def _expand(indptr, indices, keys, lengths=None):
+    # Concatena as listas indices[indptr[k]:indptr[k + 1]] de cada chave,
+    # ou só os primeiros lengths elementos de cada uma
+    starts = indptr[keys]
+    if lengths is None:
+        lengths = indptr[keys + 1] - starts
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return indices[np.repeat(starts, lengths) + offsets], lengths
+
+
+class RuleIndex:
+    """
+    Regras compiladas para consulta rápida.
+
+    O posto (rank) de cada regra resume a ordenação por lift e confiança:
+    posto 0 é a melhor regra.
+    """
+
+    def __init__(self, items, antecedents, consequents, lift, confidence):
+        self.items = list(items)
+        self._ids = {item: idx for idx, item in enumerate(self.items)}
+        self.lift = np.asarray(lift, dtype=np.float64)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self._by_rank = np.lexsort((-self.confidence, -self.lift))
+        self.rank = np.empty(len(self._by_rank), dtype=np.int64)
+        self.rank[self._by_rank] = np.arange(len(self._by_rank))
+
+        self._antecedents = [tuple(group) for group in antecedents]
+        self._consequents = [tuple(sorted(group)) for group in consequents]
+        self._antecedent_ptr, self._antecedent_items = _csr(antecedents)
+        self._consequent_ptr, self._consequent_items = _csr(
+            self._consequents
+        )
+
+        # Índice invertido: item mais seletivo do antecedente -> postos
+        frequency = np.bincount(
+            self._antecedent_items, minlength=len(self.items)
+        )
+        postings = [[] for _ in self.items]
+        for rank, rule in enumerate(self._by_rank.tolist()):
+            key = min(
+                self._antecedents[rule],
+                key=lambda item: (frequency[item], item),
+            )
+            postings[key].append(rank)
+        self._postings = postings
+        self._posting_ptr, ranks = _csr(postings)
+        self._posting_rules = self._by_rank[ranks]
+
+        # Itens distintos já garantidos ao longo de cada lista pelas regras
+        # de antecedente unitário, que disparam sempre que a chave está na
+        # cesta (deslocados por lista para uma única busca binária)
+        by_rank = self._rules_by_rank = self._by_rank.tolist()
+        covered = []
+        for key, ranks_of_key in enumerate(postings):
+            seen = set()
+            offset = key * (len(self.items) + 1)
+            for rank in ranks_of_key:
+                rule = by_rank[rank]
+                if len(self._antecedents[rule]) == 1:
+                    seen.update(self._consequents[rule])
+                covered.append(offset + len(seen))
+        self._covered = np.array(covered, dtype=np.int64)
+
+    @classmethod
+    def from_rules(cls, rules: pd.DataFrame):
+        """Compila a saída do association_rules (ou de regras_filtradas)."""
+        ids = {}
+        antecedents, consequents = [], []
+        for antecedent, consequent in zip(
+            rules["antecedents"], rules["consequents"]
+        ):
+            antecedents.append(
+                [ids.setdefault(item, len(ids)) for item in antecedent]
+            )
+            consequents.append(
+                [ids.setdefault(item, len(ids)) for item in consequent]
+            )
+        return cls(
+            list(ids),
+            antecedents,
+            consequents,
+            rules["lift"].to_numpy(),
+            rules["confidence"].to_numpy(),
+        )
+
+    def __len__(self):
+        return len(self.rank)
+
+    def recommend(self, basket, k=5):
+        """
+        Até k itens recomendados para uma cesta (iterável de nomes).
+
+        Retorna uma lista de (item, lift, confiança) da melhor regra de cada
+        item, em ordem decrescente de relevância.
+        """
+        basket = {self._ids[item] for item in basket if item in self._ids}
+        found = {}
+        for rank in heapq.merge(*(self._postings[key] for key in basket)):
+            rule = self._rules_by_rank[rank]
+            if not all(item in basket for item in self._antecedents[rule]):
+                continue
+            for item in self._consequents[rule]:
+                if item not in basket and item not in found:
+                    found[item] = rule
+            if len(found) >= k:
+                break
+        return [
+            (
+                self.items[item],
+                float(self.lift[rule]),
+                float(self.confidence[rule]),
+            )
+            for item, rule in list(found.items())[:k]
+        ]
+
+    def recommend_batch(
+        self, baskets: TransactionData, k=5, batch_size=50_000
+    ) -> pd.DataFrame:
+        """
+        Recomendações de todas as cestas, em blocos de batch_size cestas.
+
+        Retorna um DataFrame longo com cesta, posição, item, lift e
+        confiança; cestas sem recomendação não aparecem.
+        """
+        if len(self) == 0 or len(baskets) == 0:
+            return pd.DataFrame(columns=COLUMNS)
+        local = np.array(
+            [self._ids.get(item, -1) for item in baskets.items],
+            dtype=np.int64,
+        )
+        frames = [
+            self._score_block(
+                baskets, local, first, min(first + batch_size, len(baskets)), k
+            )
+            for first in range(0, len(baskets), batch_size)
+        ]
+        return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+    def _score_block(self, baskets, local, first, last, k):
+        n_items = len(self.items)
+        lo, hi = baskets.indptr[first], baskets.indptr[last]
+        sizes = np.diff(baskets.indptr[first : last + 1])
+        items = local[baskets.indices[lo:hi]]
+        rows = np.repeat(np.arange(first, last), sizes)
+        known = items >= 0
+        items, rows = items[known], rows[known]
+        basket_keys = np.sort(rows * n_items + items)
+        if len(basket_keys) == 0:
+            return pd.DataFrame(columns=COLUMNS)
+
+        # Regras examinadas: o início de cada lista dos itens da cesta, até
+        # as regras unitárias garantirem k itens fora da cesta
+        needed = np.minimum(k + sizes[rows - first], n_items)
+        cut = np.searchsorted(self._covered, items * (n_items + 1) + needed)
+        starts = self._posting_ptr[items]
+        lengths = np.minimum(
+            cut - starts + 1, self._posting_ptr[items + 1] - starts
+        )
+        rules, lengths = _expand(
+            self._posting_ptr, self._posting_rules, items, lengths
+        )
+        pair_rows = np.repeat(rows, lengths)
+
+        # A regra dispara se todos os itens do antecedente estão na cesta
+        needed, lengths = _expand(
+            self._antecedent_ptr, self._antecedent_items, rules
+        )
+        needed_keys = np.repeat(pair_rows, lengths) * n_items + needed
+        position = np.searchsorted(basket_keys, needed_keys)
+        position = np.minimum(position, len(basket_keys) - 1)
+        missing = basket_keys[position] != needed_keys
+        pair = np.repeat(np.arange(len(rules)), lengths)
+        fired = np.bincount(pair[missing], minlength=len(rules)) == 0
+        fired_rows, fired_rules = pair_rows[fired], rules[fired]
+
+        # Consequentes das regras disparadas que não estão na cesta
+        cand_items, lengths = _expand(
+            self._consequent_ptr, self._consequent_items, fired_rules
+        )
+        cand_keys = np.repeat(fired_rows, lengths) * n_items + cand_items
+        cand_rules = np.repeat(fired_rules, lengths)
+        position = np.searchsorted(basket_keys, cand_keys)
+        position = np.minimum(position, len(basket_keys) - 1)
+        new = basket_keys[position] != cand_keys
+        cand_keys, cand_rules = cand_keys[new], cand_rules[new]
+
+        # Melhor regra de cada (cesta, item)
+        order = np.lexsort((self.rank[cand_rules], cand_keys))
+        cand_keys, cand_rules = cand_keys[order], cand_rules[order]
+        unique = np.ones(len(cand_keys), dtype=bool)
+        unique[1:] = cand_keys[1:] != cand_keys[:-1]
+        cand_keys, cand_rules = cand_keys[unique], cand_rules[unique]
+        cand_rows, cand_items = np.divmod(cand_keys, n_items)
+
+        # k melhores itens de cada cesta
+        order = np.lexsort((cand_items, self.rank[cand_rules], cand_rows))
+        cand_rows = cand_rows[order]
+        cand_items, cand_rules = cand_items[order], cand_rules[order]
+        group_start = np.searchsorted(cand_rows, cand_rows, side="left")
+        position = np.arange(len(cand_rows)) - group_start
+        top = position < k
+        names = np.asarray(self.items, dtype=object)
+        return pd.DataFrame(
+            {
+                "cesta": cand_rows[top],
+                "posicao": position[top] + 1,
+                "item": names[cand_items[top]],
+                "lift": self.lift[cand_rules[top]],
+                "confianca": self.confidence[cand_rules[top]],
+            }
+        )
@@ -0,0 +1,154 @@
+"""
+Leitura das transações em formato esparso.
+
+Cada linha do arquivo é uma transação com os itens separados por vírgula.
+As linhas são lidas uma a uma e cada item vira um id inteiro; as transações
+ficam em formato CSR (indptr/indices). A memória cresce com o número de
+itens comprados, e não com transações x itens distintos como na matriz
+booleana do TransactionEncoder.
+"""
+
+import hashlib
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def parse_line(line):
+    """Itens de uma linha do arquivo, sem repetições e sem itens vazios."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    items = (item.strip() for item in line.strip().split(","))
+    return list(dict.fromkeys(item for item in items if item))
+
+
+@dataclass
+class TransactionData:
+    """
+    Transações codificadas.
+
+    A transação t contém os ids indices[indptr[t]:indptr[t + 1]], e o nome
+    do id i é items[i]. digest é o hash do conteúdo lido.
+    """
+
+    items: list
+    indptr: np.ndarray
+    indices: np.ndarray
+    digest: str
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+
+    def transaction(self, idx) -> np.ndarray:
+        return self.indices[self.indptr[idx] : self.indptr[idx + 1]]
+
+    def item_counts(self) -> np.ndarray:
+        """Quantidade de transações em que cada item aparece."""
+        return np.bincount(self.indices, minlength=self.n_items)
+
+    def count_itemsets(self, itemsets) -> np.ndarray:
+        """
+        Quantidade de transações que contêm cada conjunto de itens.
+
+        itemsets é uma sequência de conjuntos de nomes. Os pares são
+        contados todos de uma vez pela matriz de coocorrência dos itens
+        envolvidos; os conjuntos maiores, pela interseção das listas
+        invertidas (transações em ordem crescente) dos seus itens.
+        """
+        ids = {name: idx for idx, name in enumerate(self.items)}
+        counts = np.zeros(len(itemsets), dtype=np.int64)
+        pairs, larger = [], []
+        for k, itemset in enumerate(itemsets):
+            if all(name in ids for name in itemset):
+                local = [ids[name] for name in itemset]
+                (pairs if len(local) == 2 else larger).append((k, local))
+        if pairs:
+            self._count_pairs(pairs, counts)
+        if not larger:
+            return counts
+
+        order = np.argsort(self.indices, kind="stable")
+        rows = np.repeat(np.arange(len(self)), np.diff(self.indptr))[order]
+        bounds = np.searchsorted(
+            self.indices[order], np.arange(self.n_items + 1)
+        )
+        for k, local in larger:
+            local.sort(key=lambda item: bounds[item + 1] - bounds[item])
+            tids = rows[bounds[local[0]] : bounds[local[0] + 1]]
+            for item in local[1:]:
+                tids = np.intersect1d(
+                    tids,
+                    rows[bounds[item] : bounds[item + 1]],
+                    assume_unique=True,
+                )
+                if len(tids) == 0:
+                    break
+            counts[k] = len(tids)
+        return counts
+
+    def _count_pairs(self, pairs, counts, block_bytes=64 * 1024**2):
+        involved = np.unique([item for _, local in pairs for item in local])
+        column = np.full(self.n_items, -1, dtype=np.int64)
+        column[involved] = np.arange(len(involved))
+        cooccurrence = np.zeros((len(involved), len(involved)), np.int64)
+        # Matriz indicadora em blocos de transações (float32 é exato até
+        # 2**24 transações por bloco)
+        block = max(1, min(2**24, block_bytes // (4 * len(involved))))
+        for first in range(0, len(self), block):
+            last = min(first + block, len(self))
+            lo, hi = self.indptr[first], self.indptr[last]
+            cols = column[self.indices[lo:hi]]
+            rows = np.repeat(
+                np.arange(last - first), np.diff(self.indptr[first : last + 1])
+            )
+            keep = cols >= 0
+            indicator = np.zeros((last - first, len(involved)), np.float32)
+            indicator[rows[keep], cols[keep]] = 1.0
+            cooccurrence += (indicator.T @ indicator).astype(np.int64)
+        for k, (a, b) in pairs:
+            counts[k] = cooccurrence[column[a], column[b]]
+
+    def to_frame(self, limit=None) -> pd.DataFrame:
+        """
+        Matriz booleana no formato do TransactionEncoder (colunas em ordem
+        alfabética), limitada às primeiras limit transações.
+        """
+        n = len(self) if limit is None else min(limit, len(self))
+        rows = np.repeat(np.arange(n), np.diff(self.indptr[: n + 1]))
+        dense = np.zeros((n, self.n_items), dtype=bool)
+        dense[rows, self.indices[: self.indptr[n]]] = True
+        order = sorted(range(self.n_items), key=self.items.__getitem__)
+        return pd.DataFrame(
+            dense[:, order], columns=[self.items[i] for i in order]
+        )
+
+
+def read_transactions(lines) -> TransactionData:
+    """
+    Codifica as transações lidas de um iterável de linhas (bytes ou str),
+    como o arquivo enviado no st.file_uploader. Linhas vazias são ignoradas.
+    """
+    vocabulary = {}
+    indptr = array("q", [0])
+    indices = array("i")
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line if isinstance(line, bytes) else line.encode())
+        items = parse_line(line)
+        if not items:
+            continue
+        for item in items:
+            indices.append(vocabulary.setdefault(item, len(vocabulary)))
+        indptr.append(len(indices))
+    return TransactionData(
+        items=list(vocabulary),
+        indptr=np.frombuffer(indptr, dtype=np.int64).copy(),
+        indices=np.frombuffer(indices, dtype=np.int32).copy(),
+        digest=digest.hexdigest(),
+    )
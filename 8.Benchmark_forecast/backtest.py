@@ -0,0 +1,204 @@
+"""
+Backtest com origem móvel (rolling origin) dos métodos de previsão.
+
+Para cada origem (corte) c, o método é ajustado com as c primeiras
+observações e prevê as h seguintes, que são comparadas com os valores reais.
+Os métodos simples são calculados de uma vez para todas as origens. Os
+estatísticos são divididos em blocos de origens consecutivas, e cada bloco
+roda num processo do pool: o método é ajustado por completo na primeira
+origem do bloco e, nas demais, o ajuste só é estendido com as observações
+novas (Method.update), sem otimizar os parâmetros de novo. As métricas
+(MAE, RMSE, MAPE e MASE) são calculadas sobre o array de erros de todos os
+métodos, origens e passos de uma vez.
+"""
+
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from forecasting import METHODS, fit_model, predict, update_model
+
+
+@dataclass
+class BacktestResult:
+    """Previsões de cada origem, métricas e o custo do backtest."""
+
+    cutoffs: np.ndarray
+    actual: np.ndarray
+    forecasts: dict
+    metrics: pd.DataFrame
+    horizon_mae: pd.DataFrame
+    errors: list
+    seconds: float
+
+
+def rolling_origins(n, h, n_origins, step=1, min_train=36) -> np.ndarray:
+    """
+    Cortes das n_origins últimas origens, espaçados de step, que deixam h
+    observações para comparar e pelo menos min_train para o ajuste.
+    """
+    cutoffs = n - h - step * np.arange(n_origins)[::-1]
+    cutoffs = cutoffs[cutoffs >= min_train]
+    if len(cutoffs) == 0:
+        raise ValueError(
+            f"Série curta demais para o backtest: {n} observações, "
+            f"{min_train} para o ajuste e {h} para comparar"
+        )
+    return cutoffs
+
+
+def baseline_forecasts(key, values, cutoffs, h) -> np.ndarray:
+    """Previsões (origens x h) de um método simples, sem laço por origem."""
+    last = values[cutoffs - 1]
+    if key == "naive":
+        level = last
+    elif key == "mean":
+        level = np.cumsum(values)[cutoffs - 1] / cutoffs
+    elif key == "drift":
+        slope = (last - values[0]) / (cutoffs - 1)
+        return last[:, None] + np.arange(1, h + 1) * slope[:, None]
+    else:
+        raise KeyError(key)
+    return np.repeat(level[:, None], h, axis=1)
+
+
+def _run_block(key, series, cutoffs, h):
+    # Ajuste completo na primeira origem e atualização nas seguintes
+    output = np.full((len(cutoffs), h), np.nan)
+    errors = []
+    fitted, size = None, 0
+    for row, cutoff in enumerate(cutoffs):
+        train = series.iloc[:cutoff]
+        try:
+            if fitted is None:
+                fitted = fit_model(key, train)
+            else:
+                fitted = update_model(key, fitted, train, cutoff - size)
+            size = cutoff
+            output[row] = predict(key, fitted, h)
+        except Exception as error:
+            fitted = None
+            errors.append(f"origem {cutoff}: {type(error).__name__}: {error}")
+    return output, errors
+
+
+def seasonal_scale(values, cutoffs, season=12) -> np.ndarray:
+    """
+    Denominador do MASE de cada origem: erro absoluto médio do Naive
+    sazonal dentro da amostra de ajuste.
+    """
+    if cutoffs.min() <= season:
+        season = 1
+    differences = np.abs(values[season:] - values[:-season])
+    total = np.concatenate([[0.0], np.cumsum(differences)])
+    return total[cutoffs - season] / (cutoffs - season)
+
+
+def accuracy(actual, forecasts, scale):
+    """
+    MAE, RMSE, MAPE (%) e MASE de cada método e o MAE por passo.
+
+    forecasts é um dict método -> array (origens x h), como actual;
+    origens sem previsão (NaN) ficam fora das médias.
+    """
+    keys = list(forecasts)
+    errors = np.stack([forecasts[key] for key in keys]) - actual
+    absolute = np.abs(errors)
+    magnitude = np.where(actual == 0, np.nan, np.abs(actual))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        metrics = pd.DataFrame(
+            {
+                "Método": [METHODS[key].title for key in keys],
+                "MAE": np.nanmean(absolute, axis=(1, 2)),
+                "RMSE": np.sqrt(np.nanmean(errors**2, axis=(1, 2))),
+                "MAPE": 100 * np.nanmean(absolute / magnitude, axis=(1, 2)),
+                "MASE": np.nanmean(absolute / scale[:, None], axis=(1, 2)),
+                "Origens": np.isfinite(errors).all(axis=2).sum(axis=1),
+            }
+        )
+        horizon_mae = pd.DataFrame(
+            np.nanmean(absolute, axis=1).T,
+            index=pd.RangeIndex(1, actual.shape[1] + 1, name="Passo"),
+            columns=metrics["Método"],
+        )
+    return metrics, horizon_mae
+
+
+def run_backtest(
+    series,
+    h,
+    keys,
+    n_origins=24,
+    step=1,
+    refit_every=6,
+    max_workers=None,
+    on_block=None,
+) -> BacktestResult:
+    """
+    Backtest dos métodos keys nas n_origins últimas origens da série.
+
+    Parâmetros:
+    - refit_every: origens consecutivas por bloco; os parâmetros são
+      otimizados de novo a cada refit_every origens (1 reajusta em todas).
+    - on_block: chamada com (blocos concluídos, total de blocos) a cada
+      bloco de um método estatístico.
+    """
+    start = time.perf_counter()
+    values = series.to_numpy(dtype=float)
+    cutoffs = rolling_origins(len(values), h, n_origins, step)
+    actual = values[cutoffs[:, None] + np.arange(h)]
+
+    forecasts, errors = {}, []
+    for key in keys:
+        if METHODS[key].baseline:
+            forecasts[key] = baseline_forecasts(key, values, cutoffs, h)
+    statistical = [key for key in keys if not METHODS[key].baseline]
+    size = max(refit_every, 1)
+    blocks = [
+        (key, first)
+        for key in statistical
+        for first in range(0, len(cutoffs), size)
+    ]
+    if blocks:
+        for key in statistical:
+            forecasts[key] = np.full((len(cutoffs), h), np.nan)
+        workers = max_workers or min(len(blocks), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _run_block,
+                    key,
+                    series,
+                    cutoffs[first : first + size],
+                    h,
+                ): (key, first)
+                for key, first in blocks
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                key, first = futures[future]
+                output, block_errors = future.result()
+                forecasts[key][first : first + len(output)] = output
+                errors += [f"{METHODS[key].title}, {e}" for e in block_errors]
+                if on_block is not None:
+                    on_block(done, len(blocks))
+
+    # Mantém a ordem de keys na tabela
+    forecasts = {key: forecasts[key] for key in keys}
+    metrics, horizon_mae = accuracy(
+        actual, forecasts, seasonal_scale(values, cutoffs)
+    )
+    return BacktestResult(
+        cutoffs=cutoffs,
+        actual=actual,
+        forecasts=forecasts,
+        metrics=metrics,
+        horizon_mae=horizon_mae,
+        errors=errors,
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,204 @@
+"""
+Previsão em lote: cada coluna do arquivo é uma série (por exemplo, um
+produto).
+
+Os métodos simples são calculados para todas as séries de uma vez, sobre o
+array períodos x séries. Os estatísticos rodam num pool de processos em
+blocos de chunk_size séries, com um número limitado de blocos em andamento.
+As previsões são gravadas num CSV em formato longo (serie, metodo, passo,
+previsao) à medida que os blocos terminam, sem juntar tudo em memória (o
+download pela página, por outro lado, lê o arquivo inteiro; veja
+MAX_DOWNLOAD_BYTES em forecast_bench.py).
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from forecasting import METHODS, forecast
+
+COLUMNS = ["serie", "metodo", "passo", "previsao"]
+
+# Configuração do lote, enviada uma única vez para cada processo
+_index = None
+_keys = ()
+_h = 0
+
+
+@dataclass
+class BatchResult:
+    """Arquivo gerado e o custo do lote."""
+
+    path: str
+    n_series: int
+    n_rows: int
+    errors: list
+    baseline_seconds: float
+    seconds: float
+
+    @property
+    def series_per_second(self) -> float:
+        return self.n_series / max(self.seconds, 1e-9)
+
+
+def _init_worker(index, keys, h):
+    global _index, _keys, _h
+    _index, _keys, _h = index, keys, h
+
+
+def series_lengths(values) -> np.ndarray:
+    """Observações de cada coluna até o seu último valor preenchido."""
+    filled = np.isfinite(values)
+    last = len(values) - np.argmax(filled[::-1], axis=0)
+    return np.where(filled.any(axis=0), last, 0)
+
+
+def baseline_matrix(key, values, lengths, h) -> np.ndarray:
+    """
+    Previsões (séries x h) de um método simples para todas as colunas de
+    values de uma vez; lengths dá o fim de cada série. O Drift vai do
+    primeiro valor preenchido de cada série, que pode começar com lacunas,
+    até o último.
+    """
+    columns = np.arange(values.shape[1])
+    last = values[lengths - 1, columns]
+    if key == "naive":
+        level = last
+    elif key == "mean":
+        level = np.nansum(values, axis=0) / np.isfinite(values).sum(axis=0)
+    elif key == "drift":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first = np.argmax(np.isfinite(values), axis=0)
+            slope = (last - values[first, columns]) / (lengths - 1 - first)
+        return last[:, None] + np.arange(1, h + 1) * slope[:, None]
+    else:
+        raise KeyError(key)
+    return np.repeat(level[:, None], h, axis=1)
+
+
+def _long(names, key, forecasts):
+    # Formato longo: uma linha por série, método e passo
+    n_series, h = forecasts.shape
+    return pd.DataFrame(
+        {
+            "serie": np.repeat(names, h),
+            "metodo": METHODS[key].title,
+            "passo": np.tile(np.arange(1, h + 1), n_series),
+            "previsao": forecasts.ravel(),
+        }
+    )
+
+
+def _forecast_chunk(names, block, lengths):
+    frames, errors = [], []
+    for key in _keys:
+        forecasts = np.full((len(names), _h), np.nan)
+        for column, (name, length) in enumerate(zip(names, lengths)):
+            # Séries que começam depois das outras: do primeiro valor
+            # preenchido até o último, como no Drift de baseline_matrix
+            first = int(np.argmax(np.isfinite(block[:length, column])))
+            train = pd.Series(
+                block[first:length, column], index=_index[first:length]
+            )
+            try:
+                forecasts[column] = forecast(key, train, _h)
+            except Exception as error:
+                errors.append(
+                    f"{name}, {METHODS[key].title}: "
+                    f"{type(error).__name__}: {error}"
+                )
+        frames.append(_long(names, key, forecasts))
+    return pd.concat(frames, ignore_index=True), errors
+
+
+def _map_bounded(pool, function, chunks, max_pending):
+    # Limita os blocos enviados e ainda não processados
+    pending = deque()
+    for chunk in chunks:
+        pending.append((len(chunk[0]), pool.submit(function, *chunk)))
+        if len(pending) >= max_pending:
+            size, future = pending.popleft()
+            yield size, future.result()
+    while pending:
+        size, future = pending.popleft()
+        yield size, future.result()
+
+
+def run_batch(
+    data: pd.DataFrame,
+    h,
+    keys,
+    path,
+    chunk_size=50,
+    max_workers=None,
+    on_chunk=None,
+) -> BatchResult:
+    """
+    Prevê h períodos de cada coluna de data com os métodos keys e grava o
+    CSV em formato longo em path.
+
+    O índice de data é usado nas séries dos métodos estatísticos. on_chunk
+    é chamada com (séries concluídas, total de séries) a cada bloco.
+    """
+    start = time.perf_counter()
+    if (data.dtypes == object).any():
+        data = data.apply(pd.to_numeric, errors="coerce")
+    values = data.to_numpy(dtype=float)
+    lengths = series_lengths(values)
+    names = np.asarray(data.columns.astype(str), dtype=object)
+    errors = [f"{name}: sem dados" for name in names[lengths == 0]]
+    valid = lengths > 0
+    values, lengths, names = values[:, valid], lengths[valid], names[valid]
+
+    baselines = [key for key in keys if METHODS[key].baseline]
+    statistical = [key for key in keys if not METHODS[key].baseline]
+    n_rows = 0
+    with open(path, "w", newline="") as file:
+        pd.DataFrame(columns=COLUMNS).to_csv(file, index=False)
+        for key in baselines:
+            frame = _long(names, key, baseline_matrix(key, values, lengths, h))
+            frame.to_csv(file, header=False, index=False)
+            n_rows += len(frame)
+        baseline_seconds = time.perf_counter() - start
+        if on_chunk is not None and not statistical:
+            on_chunk(len(names), len(names))
+
+        if statistical and len(names):
+            workers = max_workers or os.cpu_count() or 1
+            chunks = (
+                (
+                    names[first : first + chunk_size],
+                    values[:, first : first + chunk_size],
+                    lengths[first : first + chunk_size],
+                )
+                for first in range(0, len(names), chunk_size)
+            )
+            done = 0
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(data.index, statistical, h),
+            ) as pool:
+                for size, (frame, chunk_errors) in _map_bounded(
+                    pool, _forecast_chunk, chunks, 2 * workers
+                ):
+                    frame.to_csv(file, header=False, index=False)
+                    n_rows += len(frame)
+                    errors += chunk_errors
+                    done += size
+                    if on_chunk is not None:
+                        on_chunk(done, len(names))
+
+    return BatchResult(
+        path=path,
+        n_series=len(names),
+        n_rows=n_rows,
+        errors=errors,
+        baseline_seconds=baseline_seconds,
+        seconds=time.perf_counter() - start,
+    )
@@ -1,23 +1,70 @@
 import datetime
+import json
+import os
+import tempfile
+import time
+import weakref
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 import streamlit as st
-from pmdarima import auto_arima
-from statsmodels.tsa.api import ExponentialSmoothing, Holt
+
+from backtest import run_backtest
+from batch import run_batch
+from forecasting import OK, TIMEOUT, run_methods
+from model_cache import model_cache
 
 # Configuração da página no Streamlit
 st.set_page_config(page_title="Benchmark de Séries Temporais", layout="wide")
 st.title("Benchmark de Séries Temporais")
 
+# O botão de download lê o arquivo inteiro para a memória do servidor;
+# arquivos maiores ficam só no disco, no caminho informado na página
+MAX_DOWNLOAD_BYTES = 200 * 1024**2
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SessionFile:
+    """
+    Arquivo temporário de uma sessão, removido quando o objeto é descartado:
+    ao trocar de arquivo, quando a sessão termina (o session_state é
+    liberado) ou quando o servidor é encerrado.
+    """
+
+    def __init__(self, **kwargs):
+        handle, self.path = tempfile.mkstemp(**kwargs)
+        os.close(handle)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
 
-def load_data(uploaded_file):
+    def remove(self):
+        self._finalizer()
+
+
+def load_data(uploaded_file, header=None):
     """Carrega os dados a partir de um arquivo CSV."""
-    data = pd.read_csv(uploaded_file, header=None)
+    data = pd.read_csv(uploaded_file, header=header)
     return data
 
 
+def select_period(data, data_range):
+    """
+    Séries mensais (uma por coluna), iniciando na data inicial do período,
+    com as observações até a data final.
+    """
+    start_date, end_date = data_range
+    series = data.set_axis(
+        pd.date_range(start=start_date, periods=len(data), freq="MS")
+    )
+    return series[: pd.Timestamp(end_date)]
+
+
 def plot_forecasts(actual, forecasts, titles):
     """Plota as previsões juntamente com os dados reais usando Plotly."""
     actual_length = len(actual)
@@ -60,60 +107,226 @@ def plot_forecasts(actual, forecasts, titles):
     return fig
 
 
-def forecast_methods(train, h, methods):
-    """Aplica diferentes métodos de previsão e retorna as previsões."""
-    forecast = []
-    titles = []
+def cost_table(records):
+    """Tabela de custos por método, com nomes de coluna para exibição."""
+    return pd.DataFrame(records).rename(
+        columns={
+            "metodo": "Método",
+            "situacao": "Situação",
+            "origem": "Origem",
+            "ajuste_s": "Ajuste (s)",
+            "previsao_s": "Previsão (s)",
+            "total_s": "Total (s)",
+            "pico_mb": "Pico (MB)",
+            "tracemalloc": "Com tracemalloc",
+            "detalhe": "Detalhe",
+        }
+    )
+
+
+def show_forecasts(train, h, selected, time_limit, trace_memory):
+    """
+    Previsões além do fim da série e o custo de cada método, exibidos à
+    medida que os métodos terminam.
+    """
+    chart_col, table_col = st.columns([3, 2])
+    with chart_col:
+        chart = st.empty()
+    with table_col:
+        table = st.empty()
+    progress = st.progress(0.0)
+    forecasts, titles, records = [], [], []
+    # Cada método aparece no gráfico e na tabela assim que termina
+    with st.spinner("Processando... Por Favor Aguarde!"):
+        for done, result in enumerate(
+            run_methods(
+                train,
+                h,
+                selected,
+                time_limit,
+                cache=model_cache,
+                trace_memory=trace_memory,
+            ),
+            start=1,
+        ):
+            if result.ok:
+                forecasts.append(result.forecast)
+                titles.append(result.title)
+                chart.plotly_chart(plot_forecasts(train, forecasts, titles))
+            records.append(result.record())
+            table.dataframe(
+                cost_table(records).drop(columns="Detalhe").round(3),
+                hide_index=True,
+            )
+            progress.progress(
+                done / len(selected),
+                text=f"{result.title}: {result.status}",
+            )
+    progress.empty()
+    if trace_memory:
+        table_col.caption(
+            "Tempos medidos com o tracemalloc ligado: maiores que numa "
+            "execução sem a medição de memória"
+        )
+    for row in records:
+        if row["situacao"] == TIMEOUT:
+            st.warning(f"{row['metodo']}: tempo esgotado após {time_limit} s")
+        elif row["situacao"] != OK:
+            st.error(f"{row['metodo']}: {row['detalhe']}")
+
+    # Exportação das medições com os dados da execução
+    run = {
+        "data_hora": datetime.datetime.now().isoformat(timespec="seconds"),
+        "observacoes": len(train),
+        "horizonte": int(h),
+        "memoria_medida": trace_memory,
+    }
+    with table_col:
+        export_json, export_csv = st.columns(2)
+        export_json.download_button(
+            label="Exportar Custos como JSON",
+            data=json.dumps(
+                {"execucao": run, "metodos": records},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            file_name="custos_previsao.json",
+            mime="application/json",
+        )
+        export_csv.download_button(
+            label="Exportar Custos como CSV",
+            data=pd.DataFrame(records).assign(**run).to_csv(index=False),
+            file_name="custos_previsao.csv",
+            mime="text/csv",
+        )
+    stats = model_cache.stats()
+    st.caption(
+        f"Cache de modelos: {stats['entries']} modelos, "
+        f"{stats['total_bytes'] / 1024**2:.1f} MB, {stats['hits']} acertos, "
+        f"{stats['warm_starts']} ajustes a partir de um anterior"
+    )
+
 
-    if methods["naive"]:
-        naive_forecast = np.tile(train.iloc[-1], h)
-        forecast.append(naive_forecast)
-        titles.append("Naive")
+def show_backtest(train, h, selected, n_origins, refit_every):
+    """Métricas de cada método em n_origins origens móveis."""
+    progress = st.progress(0.0)
 
-    if methods["mean"]:
-        mean_forecast = np.tile(train.mean(), h)
-        forecast.append(mean_forecast)
-        titles.append("Mean")
+    def on_block(done, total):
+        progress.progress(done / total, text=f"Bloco {done} de {total}")
 
-    if methods["drift"]:
-        drift_forecast = train.iloc[-1] + (
-            np.arange(1, h + 1)
-            * ((train.iloc[-1] - train.iloc[0]) / (len(train) - 1))
+    with st.spinner("Processando... Por Favor Aguarde!"):
+        result = run_backtest(
+            train,
+            h,
+            selected,
+            n_origins=n_origins,
+            refit_every=refit_every,
+            on_block=on_block,
         )
-        forecast.append(drift_forecast)
-        titles.append("Drift")
-
-    if methods["holt"]:
-        holt_forecast = Holt(train).fit().forecast(h)
-        forecast.append(holt_forecast)
-        titles.append("Holt")
-
-    if methods["hw"]:
-        hw_forecast = (
-            ExponentialSmoothing(
-                train, seasonal="additive", seasonal_periods=12
+    progress.empty()
+    st.caption(
+        f"{len(result.cutoffs)} origens (de "
+        f"{train.index[result.cutoffs[0] - 1]:%m/%Y} a "
+        f"{train.index[result.cutoffs[-1] - 1]:%m/%Y}) com horizonte de {h} "
+        f"períodos em {result.seconds:.1f} s"
+    )
+    st.dataframe(
+        result.metrics.sort_values("MASE").style.format(
+            {
+                "MAE": "{:.2f}",
+                "RMSE": "{:.2f}",
+                "MAPE": "{:.2f}%",
+                "MASE": "{:.3f}",
+            }
+        ),
+        hide_index=True,
+    )
+
+    fig = go.Figure()
+    for title in result.horizon_mae.columns:
+        fig.add_trace(
+            go.Scatter(
+                x=result.horizon_mae.index,
+                y=result.horizon_mae[title],
+                mode="lines+markers",
+                name=title,
             )
-            .fit()
-            .forecast(h)
         )
-        forecast.append(hw_forecast)
-        titles.append("HW Additive")
+    fig.update_layout(
+        title="MAE por Passo do Horizonte",
+        xaxis_title="Passo",
+        yaxis_title="MAE",
+        legend_title="Métodos",
+        width=800,
+        height=400,
+    )
+    st.plotly_chart(fig)
+    if result.errors:
+        with st.expander(f"{len(result.errors)} ajustes com erro"):
+            st.text("\n".join(result.errors))
+
+
+def show_batch(series, h, selected, chunk_size):
+    """Previsões de todas as colunas, gravadas num CSV em formato longo."""
+    # Um arquivo por sessão, trocado a cada lote
+    previous = st.session_state.pop("arquivo_lote", None)
+    if previous is not None:
+        previous.remove()
+    output = SessionFile(prefix="previsoes_", suffix=".csv")
+    st.session_state["arquivo_lote"] = output
+    path = output.path
 
-    if methods["arima"]:
-        arima_model = auto_arima(
-            train, seasonal=True, m=12, suppress_warnings=True
+    progress = st.progress(0.0)
+    start = time.perf_counter()
+
+    def on_chunk(done, total):
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        progress.progress(
+            done / max(total, 1),
+            text=f"{done} de {total} séries ({rate:,.1f}/s)",
         )
-        arima_forecast = arima_model.predict(n_periods=h)
-        forecast.append(arima_forecast)
-        titles.append("ARIMA")
 
-    return forecast, titles
+    with st.spinner("Processando... Por Favor Aguarde!"):
+        result = run_batch(
+            series,
+            h,
+            selected,
+            path,
+            chunk_size=chunk_size,
+            on_chunk=on_chunk,
+        )
+    progress.empty()
+    st.write(
+        f"{result.n_series} séries em {result.seconds:.1f} s "
+        f"({result.series_per_second:,.1f} séries/s); métodos simples em "
+        f"{result.baseline_seconds:.3f} s"
+    )
+    st.dataframe(pd.read_csv(path, nrows=1000), hide_index=True)
+    size = os.path.getsize(path)
+    if size <= MAX_DOWNLOAD_BYTES:
+        with open(path, "rb") as file:
+            st.download_button(
+                label="Exportar Previsões como CSV",
+                data=file,
+                file_name="previsoes.csv",
+                mime="text/csv",
+            )
+    else:
+        st.warning(
+            f"Arquivo com {size / 1024**2:,.0f} MB, acima do limite de "
+            f"{MAX_DOWNLOAD_BYTES / 1024**2:,.0f} MB para download pela "
+            f"página; as previsões estão em {path} até o fim da sessão"
+        )
+    if result.errors:
+        with st.expander(f"{len(result.errors)} séries com erro"):
+            st.text("\n".join(result.errors))
 
 
 # Interface do usuário no Streamlit
 with st.sidebar:
     uploaded_file = st.file_uploader("Escolha um Arquivo CSV", type="csv")
     if uploaded_file is not None:
+        header = st.checkbox("Primeira Linha com os Nomes das Séries")
         initial_date_range = (
             datetime.date(2000, 1, 1),
             datetime.date(2013, 12, 1),
@@ -124,6 +337,27 @@ with st.sidebar:
         forecast_horizon = st.number_input(
             "Informe o Período de Previsão", min_value=1, value=24, step=1
         )
+        mode = st.radio(
+            "Modo", ["Previsão", "Backtest", "Lote"], horizontal=True
+        )
+        if mode == "Backtest":
+            n_origins = st.number_input(
+                "Número de Origens", min_value=1, max_value=500, value=24
+            )
+            refit_every = st.number_input(
+                "Reajustar a Cada (origens)",
+                min_value=1,
+                value=6,
+                help="Entre dois reajustes completos, os modelos só são "
+                "atualizados com as observações novas",
+            )
+        elif mode == "Lote":
+            chunk_size = st.number_input(
+                "Séries por Bloco",
+                min_value=1,
+                value=50,
+                help="Cada bloco de séries roda num processo",
+            )
 
         st.write("Escolha os Métodos de Previsão")
         methods = {
@@ -134,23 +368,57 @@ with st.sidebar:
             "hw": st.checkbox("Holt-Winters", value=True),
             "arima": st.checkbox("ARIMA", value=True),
         }
+        if mode == "Previsão":
+            time_limit = st.number_input(
+                "Tempo Máximo por Método (segundos)",
+                min_value=1,
+                value=120,
+                step=10,
+            )
+            trace_memory = st.checkbox(
+                "Medir Pico de Memória",
+                value=False,
+                help="O tracemalloc deixa o ajuste mais lento: com a "
+                "medição, os tempos saem maiores e podem passar do tempo "
+                "máximo",
+            )
         process_button = st.button("Processar")
 
 if uploaded_file is not None:
-    data = load_data(uploaded_file)
+    data = load_data(uploaded_file, header=0 if header else None)
     if process_button and len(data_range) == 2:
         col1, col2 = st.columns([1, 4])
         with col1:
             st.dataframe(data)
         with col2:
-            with st.spinner("Processando... Por Favor Aguarde!"):
-                start_date, end_date = data_range
-                train = data.iloc[:, 0]
-                forecasts, titles = forecast_methods(
-                    train, forecast_horizon, methods
-                )
-                fig = plot_forecasts(train, forecasts, titles)
-                st.plotly_chart(fig)
+            series = select_period(data, data_range)
+            train = series.iloc[:, 0].astype(float)
+            selected = [key for key, chosen in methods.items() if chosen]
+            try:
+                if not selected or len(train) < 2:
+                    raise ValueError(
+                        "Selecione ao menos um método e um período com dados"
+                    )
+                if mode == "Lote":
+                    show_batch(series, forecast_horizon, selected, chunk_size)
+                elif mode == "Previsão":
+                    show_forecasts(
+                        train,
+                        forecast_horizon,
+                        selected,
+                        time_limit,
+                        trace_memory,
+                    )
+                else:
+                    show_backtest(
+                        train,
+                        forecast_horizon,
+                        selected,
+                        n_origins,
+                        refit_every,
+                    )
+            except ValueError as error:
+                st.error(str(error))
     elif process_button:
         st.warning("Por favor selecione um período de datas válidos")
 else:
@@ -0,0 +1,359 @@
+"""
+Métodos de previsão do benchmark e a execução deles em paralelo.
+
+Cada método é separado em ajuste (fit) e previsão (predict); os
+estatísticos têm também uma atualização (update), que estende um ajuste
+anterior para a série com observações novas sem otimizar os parâmetros de
+novo. Os métodos simples (Naive, Mean, Drift) custam microssegundos e rodam
+no próprio processo; os estatísticos (Holt, Holt-Winters, auto_arima) rodam
+cada um no seu processo, até max_workers ao mesmo tempo. Os resultados são
+entregues à medida que cada método termina, e um método que passa do tempo
+limite tem o processo encerrado e é informado como tempo esgotado, sem
+travar os demais.
+
+Cada execução registra o tempo de ajuste, o tempo de previsão e, se
+pedido, o pico de memória alocada (tracemalloc) do método. O modelo não é
+executado de novo para medir a memória: com a medição ligada, o tempo e o
+pico vêm da mesma execução, e os tempos saem maiores por causa do
+tracemalloc (cada registro indica se foi medido assim).
+"""
+
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+import numpy as np
+from pmdarima import auto_arima
+from statsmodels.tsa.api import ExponentialSmoothing, Holt
+
+from process_jobs import ERROR, OK, TIMEOUT, run_jobs
+
+# O tracemalloc vale para o processo inteiro: as medições feitas no próprio
+# processo (sessões do Streamlit em threads) são feitas uma de cada vez
+_tracing_lock = threading.Lock()
+
+
+def _fit_naive(train):
+    return float(train.iloc[-1])
+
+
+def _predict_constant(level, h):
+    return np.tile(level, h)
+
+
+def _fit_mean(train):
+    return float(train.mean())
+
+
+def _fit_drift(train):
+    slope = (train.iloc[-1] - train.iloc[0]) / (len(train) - 1)
+    return float(train.iloc[-1]), float(slope)
+
+
+def _predict_drift(fitted, h):
+    last, slope = fitted
+    return last + np.arange(1, h + 1) * slope
+
+
+def _fit_holt(train):
+    return Holt(train).fit()
+
+
+def _fit_hw(train, **config):
+    return ExponentialSmoothing(train, **config).fit()
+
+
+def _update_holt(fitted, train, n_new):
+    # Mesmos parâmetros e estados iniciais, filtrados na série estendida
+    params = fitted.params
+    return Holt(
+        train,
+        initialization_method="known",
+        initial_level=params["initial_level"],
+        initial_trend=params["initial_trend"],
+    ).fit(
+        smoothing_level=params["smoothing_level"],
+        smoothing_trend=params["smoothing_trend"],
+        optimized=False,
+    )
+
+
+def _update_hw(fitted, train, n_new, **config):
+    params = fitted.params
+    return ExponentialSmoothing(
+        train,
+        **config,
+        initialization_method="known",
+        initial_level=params["initial_level"],
+        initial_seasonal=params["initial_seasons"],
+    ).fit(
+        smoothing_level=params["smoothing_level"],
+        smoothing_seasonal=params["smoothing_seasonal"],
+        optimized=False,
+    )
+
+
+def _predict_smoothing(fitted, h):
+    return fitted.forecast(h)
+
+
+def _fit_arima(train, **config):
+    return auto_arima(train, **config)
+
+
+def _update_arima(fitted, train, n_new, **config):
+    # Mesma ordem; os coeficientes partem dos atuais
+    return fitted.update(train.iloc[-n_new:])
+
+
+def _arima_start(fitted):
+    # A busca stepwise parte dos termos escolhidos antes; a diferenciação
+    # não é fixada, e os testes de raiz unitária a escolhem de novo para a
+    # série estendida
+    p, _, q = map(int, fitted.order)
+    P, _, Q, _ = map(int, fitted.seasonal_order)
+    return {"start_p": p, "start_q": q, "start_P": P, "start_Q": Q}
+
+
+def _predict_arima(fitted, h):
+    return fitted.predict(n_periods=h)
+
+
+@dataclass(frozen=True)
+class Method:
+    """
+    Um método de previsão: título, ajuste e previsão.
+
+    - config: argumentos do ajuste e da atualização; entram na chave do
+      cache de modelos.
+    - update(fitted, train, n_new, **config), quando existe, estende fitted
+      para train, que tem n_new observações a mais que a série do ajuste.
+    - warm_start(fitted), quando existe, devolve argumentos extras para um
+      novo ajuste partir do resultado de um ajuste anterior.
+    """
+
+    title: str
+    fit: object
+    predict: object
+    baseline: bool = False
+    config: dict = field(default_factory=dict)
+    update: object = None
+    warm_start: object = None
+
+
+METHODS = {
+    "naive": Method("Naive", _fit_naive, _predict_constant, baseline=True),
+    "mean": Method("Mean", _fit_mean, _predict_constant, baseline=True),
+    "drift": Method("Drift", _fit_drift, _predict_drift, baseline=True),
+    "holt": Method(
+        "Holt", _fit_holt, _predict_smoothing, update=_update_holt
+    ),
+    "hw": Method(
+        "HW Additive",
+        _fit_hw,
+        _predict_smoothing,
+        config={"seasonal": "additive", "seasonal_periods": 12},
+        update=_update_hw,
+    ),
+    "arima": Method(
+        "ARIMA",
+        _fit_arima,
+        _predict_arima,
+        config={"seasonal": True, "m": 12, "suppress_warnings": True},
+        update=_update_arima,
+        warm_start=_arima_start,
+    ),
+}
+
+
+def fit_model(key, train, **search):
+    """Ajusta o método key; search são argumentos de warm_start."""
+    method = METHODS[key]
+    return method.fit(train, **method.config, **search)
+
+
+def update_model(key, fitted, train, n_new):
+    """Estende o ajuste para train, ou ajusta de novo sem update."""
+    method = METHODS[key]
+    if method.update is None:
+        return method.fit(train, **method.config)
+    return method.update(fitted, train, n_new, **method.config)
+
+
+def predict(key, fitted, h) -> np.ndarray:
+    return np.asarray(METHODS[key].predict(fitted, h), dtype=float)
+
+
+def forecast(key, train, h) -> np.ndarray:
+    """Ajusta o método key na série train e prevê h períodos."""
+    return predict(key, fit_model(key, train), h)
+
+
+@dataclass
+class MethodResult:
+    """
+    Previsão de um método ou o motivo de ela não existir.
+
+    origin diz de onde veio o ajuste: novo, com partida de um ajuste
+    anterior ou do cache de modelos. peak_bytes é o pico de memória alocada
+    durante o ajuste e a previsão (None quando não medido). traced indica
+    que os tempos foram medidos com o tracemalloc ligado e, portanto, saem
+    maiores que numa execução normal.
+    """
+
+    key: str
+    status: str
+    forecast: np.ndarray = None
+    seconds: float = 0.0
+    message: str = ""
+    origin: str = ""
+    fitted: object = None
+    fit_seconds: float = 0.0
+    predict_seconds: float = 0.0
+    peak_bytes: int = None
+    traced: bool = False
+
+    @property
+    def title(self) -> str:
+        return METHODS[self.key].title
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+    def record(self) -> dict:
+        """Linha da tabela de custos do método."""
+        return {
+            "metodo": self.title,
+            "situacao": self.status,
+            "origem": self.origin,
+            "ajuste_s": self.fit_seconds,
+            "previsao_s": self.predict_seconds,
+            "total_s": self.seconds,
+            "pico_mb": (
+                None if self.peak_bytes is None else self.peak_bytes / 1024**2
+            ),
+            "tracemalloc": self.traced,
+            "detalhe": self.message,
+        }
+
+
+def _run(
+    key,
+    train,
+    h,
+    search=None,
+    fitted=None,
+    keep_fitted=False,
+    origin="ajuste",
+    trace_memory=False,
+):
+    # Ajusta (ou usa o ajuste recebido) e prevê uma única vez, medindo o
+    # tempo e, se pedido, a memória na mesma execução
+    result = MethodResult(key, OK, origin=origin, traced=trace_memory)
+    tracing = trace_memory and _tracing_lock.acquire(blocking=True)
+    if tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if fitted is None:
+            fitted = fit_model(key, train, **(search or {}))
+            result.fit_seconds = time.perf_counter() - start
+        predict_start = time.perf_counter()
+        result.forecast = predict(key, fitted, h)
+        result.predict_seconds = time.perf_counter() - predict_start
+    except Exception as error:
+        result.status = ERROR
+        result.message = f"{type(error).__name__}: {error}"
+    finally:
+        result.seconds = time.perf_counter() - start
+        if tracing:
+            result.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _tracing_lock.release()
+    if result.ok and keep_fitted:
+        result.fitted = fitted
+    return result
+
+
+def _worker(*args):
+    # Processo novo: a trava pode ter sido copiada fechada no fork
+    global _tracing_lock
+    _tracing_lock = threading.Lock()
+    return _run(*args)
+
+
+def run_methods(
+    train,
+    h,
+    keys,
+    time_limit=None,
+    max_workers=None,
+    cache=None,
+    trace_memory=False,
+):
+    """
+    Roda os métodos keys em paralelo e entrega um MethodResult por método,
+    na ordem em que terminam.
+
+    Parâmetros:
+    - time_limit: tempo máximo de cada método em segundos, contado a partir
+      do início do seu processo (None para não limitar).
+    - cache: ModelCache com os ajustes dos métodos estatísticos. Um método
+      já ajustado nesta série só prevê; um ajuste novo parte do ajuste
+      guardado de um trecho inicial da série, quando o método permite.
+    - trace_memory: mede o pico de memória de cada método com o
+      tracemalloc na mesma execução cronometrada; os tempos registrados
+      ficam maiores e são marcados em MethodResult.traced.
+    """
+    jobs = []
+    for key in keys:
+        if METHODS[key].baseline:
+            yield _run(key, train, h, trace_memory=trace_memory)
+            continue
+        fitted = cache.get(key, train) if cache is not None else None
+        if fitted is not None:
+            yield _run(
+                key,
+                train,
+                h,
+                fitted=fitted,
+                origin="cache",
+                trace_memory=trace_memory,
+            )
+            continue
+        search, origin = None, "ajuste"
+        if cache is not None:
+            search = cache.warm_start(key, train)
+            if search:
+                origin = "ajuste a partir do anterior"
+        # Argumentos de _run: search, fitted, keep_fitted, origin e
+        # trace_memory
+        jobs.append(
+            (
+                key,
+                (
+                    key,
+                    train,
+                    h,
+                    search,
+                    None,
+                    cache is not None,
+                    origin,
+                    trace_memory,
+                ),
+            )
+        )
+
+    for key, status, value, seconds in run_jobs(
+        _worker, jobs, time_limit, max_workers
+    ):
+        if status != OK:
+            message = value if status == ERROR else ""
+            yield MethodResult(key, status, seconds=seconds, message=message)
+            continue
+        if value.fitted is not None:
+            cache.put(key, train, value.fitted)
+            value.fitted = None
+        yield value
@@ -0,0 +1,202 @@
+"""
+Cache em disco dos modelos ajustados do benchmark.
+
+A chave é um hash dos valores e do índice da série de treino junto com o
+método e a sua configuração (Method.config); o horizonte não entra, então
+mudar o horizonte só chama a previsão do ajuste guardado. Cada entrada tem
+um pickle com o modelo e um JSON com os metadados, lidos na inicialização.
+
+Os metadados guardam também os argumentos de warm_start do método (para o
+auto_arima, a ordem escolhida). Quando a série é estendida com observações
+novas, o ajuste novo parte do ajuste guardado do trecho inicial mais longo
+da série, em vez de buscar do zero.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+import numpy as np
+
+from forecasting import METHODS
+
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".modelos"
+)
+
+
+def series_digest(train) -> str:
+    """Hash dos valores da série, do início do índice e da frequência."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(train.to_numpy(dtype=float)).tobytes())
+    if len(train):
+        digest.update(str(train.index[0]).encode())
+    digest.update(str(getattr(train.index, "freqstr", None)).encode())
+    return digest.hexdigest()
+
+
+def config_digest(key) -> str:
+    """Hash do método e da sua configuração."""
+    payload = json.dumps([key, METHODS[key].config], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ModelCache:
+    """
+    Cache LRU de modelos ajustados em disco, limitado pelo tamanho total.
+
+    A data de modificação do pickle marca o último uso, de modo que a ordem
+    LRU sobrevive a reinícios do servidor.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=512 * 1024**2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, digest, extension):
+        return os.path.join(self.directory, f"{digest}.{extension}")
+
+    def _scan(self):
+        for name in os.listdir(self.directory):
+            digest, extension = os.path.splitext(name)
+            if extension != ".json" or name.startswith("."):
+                continue
+            try:
+                with open(self._path(digest, "json")) as file:
+                    meta = json.load(file)
+                meta["bytes"] = os.path.getsize(self._path(digest, "pkl"))
+            except (OSError, ValueError):
+                continue
+            self._entries[digest] = meta
+
+    @staticmethod
+    def _digest(key, train):
+        payload = f"{config_digest(key)}:{series_digest(train)}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, train):
+        """Modelo do método key ajustado em train, ou None."""
+        digest = self._digest(key, train)
+        with self._lock:
+            if digest not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(digest, "pkl")
+            try:
+                with open(path, "rb") as file:
+                    fitted = pickle.load(file)
+                os.utime(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                # Entrada corrompida ou removida por fora: trata como ausente
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return fitted
+
+    def put(self, key, train, fitted):
+        """Salva o modelo e descarta as entradas usadas há mais tempo."""
+        digest = self._digest(key, train)
+        method = METHODS[key]
+        meta = {
+            "method": key,
+            "config": config_digest(key),
+            "length": len(train),
+            "series": series_digest(train),
+            "start": (
+                method.warm_start(fitted) if method.warm_start else None
+            ),
+        }
+        # Grava em arquivos temporários e move de uma vez, para que uma
+        # leitura concorrente nunca veja uma entrada pela metade
+        staging = []
+        for extension, payload in (
+            ("pkl", pickle.dumps(fitted)),
+            ("json", json.dumps(meta).encode("utf-8")),
+        ):
+            handle, path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+            with os.fdopen(handle, "wb") as file:
+                file.write(payload)
+            staging.append((path, self._path(digest, extension)))
+        with self._lock:
+            for source, target in staging:
+                os.replace(source, target)
+            meta["bytes"] = os.path.getsize(self._path(digest, "pkl"))
+            self._entries[digest] = meta
+            self._enforce_budget()
+
+    def warm_start(self, key, train) -> dict:
+        """
+        Argumentos de warm_start do ajuste guardado do trecho inicial mais
+        longo de train, para o mesmo método e configuração ({} se nenhum).
+        """
+        if METHODS[key].warm_start is None:
+            return {}
+        config = config_digest(key)
+        with self._lock:
+            candidates = sorted(
+                (
+                    meta
+                    for meta in self._entries.values()
+                    if meta["config"] == config
+                    and meta["start"] is not None
+                    and 0 < meta["length"] < len(train)
+                ),
+                key=lambda meta: -meta["length"],
+            )
+        for meta in candidates:
+            if series_digest(train.iloc[: meta["length"]]) == meta["series"]:
+                with self._lock:
+                    self.warm_starts += 1
+                return dict(meta["start"])
+        return {}
+
+    def _remove(self, digest):
+        for extension in ("pkl", "json"):
+            try:
+                os.remove(self._path(digest, extension))
+            except OSError:
+                pass
+        self._entries.pop(digest, None)
+
+    def _enforce_budget(self):
+        total = sum(meta["bytes"] for meta in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(
+            self._entries,
+            key=lambda digest: os.path.getmtime(self._path(digest, "pkl")),
+        )
+        for digest in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._entries[digest]["bytes"]
+            self._remove(digest)
+
+    def stats(self) -> dict:
+        """Acertos, faltas, partidas a quente e ocupação do cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "warm_starts": self.warm_starts,
+                "entries": len(self._entries),
+                "total_bytes": sum(
+                    meta["bytes"] for meta in self._entries.values()
+                ),
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Cache padrão, compartilhado por todas as sessões do processo
+model_cache = ModelCache()
@@ -0,0 +1,99 @@
+"""
+Execução de tarefas em processos separados, cada uma com o seu tempo limite.
+
+Cada tarefa roda no seu processo (multiprocessing.Process) e devolve o
+resultado por um Pipe; até max_workers processos rodam ao mesmo tempo. Uma
+tarefa que passa do tempo limite tem o processo encerrado, sem travar as
+demais. Usado pelos métodos estatísticos (forecasting.run_methods).
+"""
+
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+OK = "ok"
+TIMEOUT = "tempo esgotado"
+ERROR = "erro"
+
+
+def _call(conn, target, args):
+    try:
+        conn.send(target(*args))
+    finally:
+        conn.close()
+
+
+def run_jobs(
+    target, jobs, time_limit=None, max_workers=None, total_limit=None
+):
+    """
+    Roda target(*args) para cada (tag, args) de jobs e entrega
+    (tag, status, value, seconds) na ordem em que as tarefas terminam.
+
+    - status OK: value é o retorno de target.
+    - status TIMEOUT: a tarefa passou de time_limit segundos, contados do
+      início do seu processo, e o processo foi encerrado.
+    - status ERROR: o processo terminou sem responder; value é a mensagem.
+
+    total_limit é o tempo total em segundos: as tarefas que ainda não
+    começaram quando ele acaba não são iniciadas nem entregues. Se o
+    consumo for interrompido, os processos em andamento são encerrados.
+    """
+    start = time.perf_counter()
+    queue = list(jobs)
+    workers = max_workers or min(len(queue), os.cpu_count() or 1) or 1
+    running = {}
+    try:
+        while queue or running:
+            expired = (
+                total_limit is not None
+                and time.perf_counter() - start >= total_limit
+            )
+            while queue and len(running) < workers and not expired:
+                tag, args = queue.pop(0)
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_call, args=(sender, target, args), daemon=True
+                )
+                process.start()
+                sender.close()
+                running[receiver] = (tag, process, time.perf_counter())
+            if not running:
+                break
+
+            timeout = None
+            if time_limit is not None:
+                first_deadline = min(
+                    started + time_limit for _, _, started in running.values()
+                )
+                timeout = max(0.0, first_deadline - time.perf_counter())
+            for receiver in wait(list(running), timeout):
+                tag, process, started = running.pop(receiver)
+                try:
+                    status, value = OK, receiver.recv()
+                except EOFError:
+                    status, value = ERROR, None
+                seconds = time.perf_counter() - started
+                receiver.close()
+                process.join()
+                if status == ERROR:
+                    value = f"processo encerrado ({process.exitcode})"
+                yield tag, status, value, seconds
+
+            if time_limit is None:
+                continue
+            now = time.perf_counter()
+            for receiver, (tag, process, started) in list(running.items()):
+                if now - started >= time_limit:
+                    del running[receiver]
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    yield tag, TIMEOUT, None, now - started
+    finally:
+        # Consumo interrompido (por exemplo, um rerun do Streamlit)
+        for receiver, (_, process, _) in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()